@@ -1,47 +1,271 @@
 from __future__ import annotations
 
-import pandas as pd
+import asyncio
+from contextlib import contextmanager
+from datetime import timedelta
+
 from temporalio import activity
+from temporalio.exceptions import ApplicationError
+
+from .sheets import get_sheet_client
+from .campaigns import get_campaign_store
+from .deliverability import INVALID_ADDRESS_ERROR, get_address_validator
+from .emailer import PermanentSendError, SendGridError, get_emailer
+from .logsink import log_sink
+from .prevalidate import prevalidate_members
+from .settings import settings
+from .utils import count_members_in_sheet, get_members_from_sheet
 
-from .sheets import sheet_client
-from .emailer import emailer
+# ApplicationError type raised by send_and_log_email when the send outcome is
+# known but could not be logged; its first detail is that outcome.
+DELIVERY_LOG_ERROR = "DeliveryLogError"
 
-from dotenv import load_dotenv
-load_dotenv()
+
+@contextmanager
+def _sendgrid_errors():
+    """
+    Re-raise classified SendGrid failures as ApplicationErrors typed by
+    class name: permanent ones are non-retryable, transient ones carry
+    Retry-After / circuit breaker delay as the next retry delay.
+    """
+    try:
+        yield
+    except SendGridError as e:
+        raise ApplicationError(
+            str(e),
+            type=type(e).__name__,
+            non_retryable=not e.retryable,
+            next_retry_delay=timedelta(seconds=e.retry_after) if e.retry_after else None,
+        ) from e
 
 
 @activity.defn(name="lookup_member_in_sheet")
-async def lookup_member_in_sheet(member_id: str, email: str) -> dict:
+def lookup_member_in_sheet(member_id: str, email: str) -> dict:
     """
     Validate (member_id, email) exists in the Members roster.
     Returns {"found": bool, "row": {...}} if found.
     """
-    df: pd.DataFrame = sheet_client.members_df()
-
-    if df.empty:
+    row = get_sheet_client().lookup_member(member_id, email)
+    if row is None:
         return {"found": False}
 
-    # Normalize
-    df["member_id"] = df["member_id"].astype(str).str.strip()
-    df["email"] = df["email"].astype(str).str.strip().str.lower()
+    return {"found": True, "row": row}
 
-    member_id_norm = str(member_id).strip()
-    email_norm = email.strip().lower()
 
-    match = df[(df["member_id"] == member_id_norm) & (df["email"] == email_norm)]
-    if match.empty:
-        return {"found": False}
+@activity.defn(name="store_campaign_payload")
+def store_campaign_payload(payload: dict) -> str:
+    """Persist a campaign's template payload once and return its campaign_ref."""
+    return get_campaign_store().put(payload)
 
-    row = match.iloc[0].to_dict()
-    return {"found": True, "row": row}
+
+async def _campaign_payload(campaign_ref: str | None) -> dict:
+    if not campaign_ref:
+        return {}
+    # Usually an in-process cache hit; the first use in a worker reads the store
+    return await asyncio.to_thread(get_campaign_store().get, campaign_ref)
+
+
+def _fetch_member_page(sheet_tab: str, offset: int, limit: int) -> list[dict]:
+    """
+    Return up to `limit` compact {"member_id", "email"} records from the
+    given tab, starting at row `offset` (0-based, header excluded).
+    """
+    # One header read plus one A1 range read for just this page
+    return get_members_from_sheet(
+        sheet_id=settings.GOOGLE_SHEET_ID,
+        sheet_tab=sheet_tab,
+        service_account_path=settings.GOOGLE_SA_JSON_PATH,
+        offset=offset,
+        limit=limit,
+    )
+
+
+@activity.defn(name="count_member_rows")
+def count_member_rows(sheet_tab: str) -> int:
+    """Rows in the given tab (header excluded), for campaign pacing and ETAs."""
+    return count_members_in_sheet(
+        sheet_id=settings.GOOGLE_SHEET_ID,
+        sheet_tab=sheet_tab,
+        service_account_path=settings.GOOGLE_SA_JSON_PATH,
+    )
+
+
+@activity.defn(name="fetch_verified_page")
+def fetch_verified_page(
+    sheet_tab: str,
+    offset: int,
+    limit: int,
+    campaign_id: str,
+    campaign_ref: str | None = None,
+    resend_statuses: list[str] | None = None,
+) -> dict:
+    """
+    A page of {"member_id", "email"} records, pre-validated in bulk
+    against the roster and the suppression index, so only verified
+    members reach the send stage.
+
+    Returns {"fetched": rows covered, "verified": [...], "rejected": [...]}
+    as described in prevalidate_members. "fetched" is `limit` (the range
+    may end in blank rows the Sheets API leaves out) or 0 once the range
+    is empty, which ends the tab.
+    """
+    page = _fetch_member_page(sheet_tab, offset, limit)
+    return {
+        "fetched": limit if page else 0,
+        **prevalidate_members(page, campaign_id, campaign_ref, resend_statuses),
+    }
+
+
+def _tracking_args(
+    workflow_id: str,
+    run_id: str,
+    member_id: str | None,
+    campaign_id: str | None = None,
+    campaign_ref: str | None = None,
+) -> dict[str, str]:
+    """
+    SendGrid custom_args identifying a send; they come back on every event
+    webhook for the message, so events can be tied to the delivery log.
+    """
+    args = {
+        "workflow_id": workflow_id,
+        "run_id": run_id,
+        "member_id": member_id,
+        "campaign_id": campaign_id,
+        "campaign_ref": campaign_ref,
+    }
+    return {k: str(v) for k, v in args.items() if v}
 
 
 @activity.defn(name="send_email_via_sendgrid")
-async def send_email_via_sendgrid(email: str, template_data: dict) -> str:
+async def send_email_via_sendgrid(
+    email: str,
+    template_data: dict,
+    campaign_ref: str | None = None,
+    campaign_id: str | None = None,
+) -> str:
     """
     Send the templated email via SendGrid and return a status string.
+    With `campaign_ref`, the stored campaign payload is merged over
+    `template_data`; `campaign_id` tags the send so its webhook events
+    are logged under the campaign. Addresses that fail the syntax/domain check raise a
+    non-retryable InvalidAddress error without calling SendGrid.
+    """
+    problem = await asyncio.to_thread(get_address_validator().check, email)
+    if problem:
+        raise ApplicationError(problem, type=INVALID_ADDRESS_ERROR, non_retryable=True)
+    payload = await _campaign_payload(campaign_ref)
+    info = activity.info()
+    custom_args = _tracking_args(
+        info.workflow_id, info.workflow_run_id, template_data.get("member_id"),
+        campaign_id, campaign_ref,
+    )
+    with _sendgrid_errors():
+        return await get_emailer().send(
+            email, {**template_data, **payload}, custom_args=custom_args
+        )
+
+
+@activity.defn(name="send_and_log_email")
+async def send_and_log_email(
+    workflow_id: str,
+    run_id: str,
+    member_id: str,
+    email: str,
+    template_data: dict,
+    campaign_ref: str | None = None,
+    campaign_id: str | None = None,
+) -> dict:
+    """
+    send_email_via_sendgrid and log_delivery_event fused into one activity
+    for the lean member path. Returns the logged outcome,
+    {"status": "sent" | "invalid_address" | "failed", "sendgrid_status",
+    "message"}; "failed" is a permanent SendGrid rejection.
+
+    Delivery is at least once. The outcome is heartbeated as soon as it is
+    known, so a retry after a failed log write only logs; the log row itself
+    is deduped by its event id. But a worker that dies between SendGrid
+    accepting the message and that heartbeat leaves nothing behind, and the
+    retry sends again; SendGrid has no idempotency key to catch it. A failed log write raises a DELIVERY_LOG_ERROR
+    carrying the outcome, so the workflow can still log it once retries run
+    out. Transient send errors raise and are retried.
     """
-    return emailer.send(email, template_data)
+    details = activity.info().heartbeat_details
+    outcome = details[0] if details else None
+
+    if outcome is None:
+        problem = await asyncio.to_thread(get_address_validator().check, email)
+        if problem:
+            outcome = {"status": "invalid_address", "sendgrid_status": "", "message": problem}
+        else:
+            payload = await _campaign_payload(campaign_ref)
+            with _sendgrid_errors():  # transient errors: raise and retry
+                try:
+                    sg_status = await get_emailer().send(
+                        email,
+                        {**template_data, **payload},
+                        custom_args=_tracking_args(
+                            workflow_id, run_id, member_id, campaign_id, campaign_ref
+                        ),
+                    )
+                    outcome = {
+                        "status": "sent",
+                        "sendgrid_status": sg_status,
+                        "message": f"SendGrid status {sg_status}",
+                    }
+                except PermanentSendError as e:
+                    outcome = {
+                        "status": "failed",
+                        "sendgrid_status": f"{e.status_code or ''}",
+                        "message": f"PermanentSendError: {e}",
+                    }
+        activity.heartbeat(outcome)
+
+    try:
+        await log_sink.write(
+            {
+                "campaign_id": campaign_id or "",
+                "campaign_ref": campaign_ref or "",
+                "workflow_id": workflow_id,
+                "run_id": run_id,
+                "member_id": member_id,
+                "email": email,
+                **outcome,
+            }
+        )
+    except Exception as e:
+        # Retryable; carries the outcome for the workflow once retries run out
+        raise ApplicationError(
+            f"Logging {outcome['status']} failed: {e}", outcome, type=DELIVERY_LOG_ERROR
+        ) from e
+    return outcome
+
+
+@activity.defn(name="send_email_batch")
+async def send_email_batch(recipients: list[dict], campaign_ref: str | None = None) -> list[dict]:
+    """
+    Send to many recipients via SendGrid personalizations and return one
+    status dict per recipient, in input order. With `campaign_ref`, the
+    stored campaign payload is merged into every recipient's template data.
+    """
+    info = activity.info()
+    payload = await _campaign_payload(campaign_ref)
+    recipients = [
+        {
+            **r,
+            "dynamic_template_data": {**(r.get("dynamic_template_data") or {}), **payload},
+            # Batches are sent by the campaign workflow itself
+            "custom_args": _tracking_args(
+                info.workflow_id,
+                info.workflow_run_id,
+                (r.get("dynamic_template_data") or {}).get("member_id"),
+                info.workflow_id,
+                campaign_ref,
+            ),
+        }
+        for r in recipients
+    ]
+    return await get_emailer().send_batch(recipients)
 
 
 @activity.defn(name="log_delivery_event")
@@ -53,12 +277,18 @@ async def log_delivery_event(
     status: str,
     message: str = "",
     sendgrid_status: str = "",
+    campaign_id: str = "",
+    campaign_ref: str = "",
 ) -> None:
     """
-    Append a delivery log row to the Log sheet/CSV.
+    Append a delivery log row to the delivery log (Log sheet, CSV or
+    ledger). Rows are buffered and written in batches; this returns once
+    the row has been flushed.
     """
-    sheet_client.append_log(
+    await log_sink.write(
         {
+            "campaign_id": campaign_id,
+            "campaign_ref": campaign_ref,
             "workflow_id": workflow_id,
             "run_id": run_id,
             "member_id": member_id,
@@ -68,3 +298,11 @@ async def log_delivery_event(
             "sendgrid_status": sendgrid_status,
         }
     )
+
+
+@activity.defn(name="log_delivery_events")
+async def log_delivery_events(rows: list[dict]) -> None:
+    """
+    Append several delivery log rows (same keys as log_delivery_event).
+    """
+    await asyncio.gather(*(log_sink.write(row) for row in rows))
@@ -1,9 +1,16 @@
 from __future__ import annotations
 
+import hmac
+import logging
+import threading
+import time
+from collections import Counter, OrderedDict
+
 from fastapi import Header, HTTPException, status
 from typing import Optional
 
 from .settings import settings
+from .metrics import AUTH_OUTCOMES
 
 try:
     import jwt  # pyjwt
@@ -11,53 +18,134 @@ try:
 except ImportError:
     HAVE_JWT = False
 
+logger = logging.getLogger(__name__)
+
 
 def _unauthorized(detail: str = "Unauthorized"):
     raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=detail)
 
 
-async def require_auth(authorization: Optional[str] = Header(default=None, alias="Authorization")):
-    print("\n=== [AUTH DEBUG] ===")
-    print(f"🔐 Incoming Header: {authorization}")
-    print(f"🔐 Static Token Expected: {settings.AUTH_STATIC_BEARER_TOKEN}")
-    print(f"🔐 JWT Secret Set: {bool(settings.AUTH_JWT_SECRET)}")
+class TokenVerifier:
+    """
+    Bearer-token check built once from settings.
 
-    if not settings.AUTH_STATIC_BEARER_TOKEN and not settings.AUTH_JWT_SECRET:
-        print("✅ No auth required (none configured)")
-        return
+    The static token is compared in constant time. Verified JWTs are kept in
+    a bounded LRU until their `exp` (or AUTH_CACHE_TTL_SECONDS, if sooner),
+    so repeat callers skip signature verification. Outcomes are counted in
+    `counters` and logged as structured `auth` events.
+    """
 
-    if not authorization or not authorization.lower().startswith("bearer "):
-        print("❌ Missing or invalid Authorization header format")
-        _unauthorized("Missing or invalid Authorization header")
+    def __init__(
+        self,
+        static_token: str | None,
+        jwt_secret: str | None,
+        jwt_audience: str | None = None,
+        jwt_issuer: str | None = None,
+        cache_size: int = 1024,
+        cache_ttl: float = 300.0,
+    ):
+        self._static = static_token.encode() if static_token else None
+        self._jwt_secret = jwt_secret
+        self._decode_kwargs: dict = {"algorithms": ["HS256"]}
+        if jwt_audience:
+            self._decode_kwargs["audience"] = jwt_audience
+        if jwt_issuer:
+            self._decode_kwargs["issuer"] = jwt_issuer
 
-    token = authorization.split(" ", 1)[1].strip()
-    print(f"🔑 Token Extracted: {token}")
+        self._cache: OrderedDict[str, float] = OrderedDict()
+        self._cache_size = cache_size
+        self._cache_ttl = cache_ttl
+        self._lock = threading.Lock()
+        self.counters: Counter[str] = Counter()
 
-    if settings.AUTH_STATIC_BEARER_TOKEN:
-        if token == settings.AUTH_STATIC_BEARER_TOKEN:
-            print("✅ Static token matched!")
-            return
+    @classmethod
+    def from_settings(cls) -> "TokenVerifier":
+        return cls(
+            static_token=settings.AUTH_STATIC_BEARER_TOKEN,
+            jwt_secret=settings.AUTH_JWT_SECRET,
+            jwt_audience=settings.AUTH_JWT_AUDIENCE,
+            jwt_issuer=settings.AUTH_JWT_ISSUER,
+            cache_size=settings.AUTH_CACHE_SIZE,
+            cache_ttl=settings.AUTH_CACHE_TTL_SECONDS,
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._static or self._jwt_secret)
+
+    def _record(self, outcome: str, ok: bool, detail: str = "") -> None:
+        self.counters[outcome] += 1
+        AUTH_OUTCOMES.labels(outcome).inc()
+        if ok:
+            logger.debug("auth", extra={"event": "auth", "outcome": outcome})
         else:
-            print("❌ Static token does not match!")
+            logger.warning(
+                "auth rejected: %s", outcome,
+                extra={"event": "auth", "outcome": outcome, "detail": detail},
+            )
+
+    def _cached(self, token: str, now: float) -> bool:
+        with self._lock:
+            expires_at = self._cache.get(token)
+            if expires_at is None:
+                return False
+            if expires_at <= now:
+                del self._cache[token]
+                return False
+            self._cache.move_to_end(token)
+            return True
+
+    def _remember(self, token: str, claims: dict, now: float) -> None:
+        expires_at = now + self._cache_ttl
+        if isinstance(claims.get("exp"), (int, float)):
+            expires_at = min(expires_at, claims["exp"])
+        with self._lock:
+            self._cache[token] = expires_at
+            self._cache.move_to_end(token)
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+
+    def verify(self, authorization: Optional[str]) -> None:
+        """Return if the header is acceptable; raise 401 otherwise."""
+        if not self.enabled:
+            self.counters["open"] += 1
+            AUTH_OUTCOMES.labels("open").inc()
+            return
+
+        if not authorization or not authorization.lower().startswith("bearer "):
+            self._record("missing_header", ok=False)
+            _unauthorized("Missing or invalid Authorization header")
+
+        token = authorization.split(" ", 1)[1].strip()
+
+        if self._static:
+            if hmac.compare_digest(token.encode(), self._static):
+                self._record("static_ok", ok=True)
+                return
+            self._record("static_mismatch", ok=False)
             _unauthorized("Invalid token")
 
-    if settings.AUTH_JWT_SECRET:
         if not HAVE_JWT:
+            self._record("jwt_unavailable", ok=False)
             _unauthorized("JWT support not installed (pyjwt)")
 
-        try:
-            decode_kwargs = {"algorithms": ["HS256"]}
-            if settings.AUTH_JWT_AUDIENCE:
-                decode_kwargs["audience"] = settings.AUTH_JWT_AUDIENCE
-            if settings.AUTH_JWT_ISSUER:
-                decode_kwargs["issuer"] = settings.AUTH_JWT_ISSUER
-
-            jwt.decode(token, settings.AUTH_JWT_SECRET, **decode_kwargs)
-            print("✅ JWT verified successfully!")
+        now = time.time()
+        if self._cached(token, now):
+            self._record("jwt_cached", ok=True)
             return
+
+        try:
+            claims = jwt.decode(token, self._jwt_secret, **self._decode_kwargs)
         except Exception as e:
-            print(f"❌ JWT verification failed: {e}")
+            self._record("jwt_invalid", ok=False, detail=type(e).__name__)
             _unauthorized("JWT verification failed")
 
-    print("❌ Reached unexpected end of auth check")
-    _unauthorized("Authorization failed")
+        self._remember(token, claims, now)
+        self._record("jwt_ok", ok=True)
+
+
+verifier = TokenVerifier.from_settings()
+
+
+async def require_auth(authorization: Optional[str] = Header(default=None, alias="Authorization")):
+    verifier.verify(authorization)
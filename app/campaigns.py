@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import csv
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from .settings import settings
+from .sheets import sheets_access
+from .metrics import register_stats
+
+CAMPAIGN_COLUMNS = ["campaign_ref", "created_ts", "payload"]
+
+
+def campaign_ref(payload: dict) -> str:
+    """Content hash of a template payload; equal payloads share a ref."""
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return "c-" + hashlib.sha256(canonical.encode()).hexdigest()[:24]
+
+
+class CampaignStore:
+    """
+    Template payloads persisted once per campaign and referenced by
+    `campaign_ref`, so member workflows and their send activities carry a
+    short id instead of the payload.
+
+    Stored in the 'Campaigns' tab (or a CSV fallback). Payloads are
+    immutable for a given ref, so resolved ones are kept in an in-process
+    LRU and never re-read.
+    """
+
+    def __init__(self, cache_size: int = 256):
+        self._sheets = sheets_access()
+        self._cache: OrderedDict[str, dict] = OrderedDict()
+        self._cache_size = cache_size
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _use_sheets(self) -> bool:
+        return self._sheets.available and bool(settings.GOOGLE_SHEET_ID)
+
+    def _remember(self, ref: str, payload: dict) -> None:
+        with self._lock:
+            self._cache[ref] = payload
+            self._cache.move_to_end(ref)
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+
+    def _load(self, ref: str) -> str | None:
+        """Raw JSON payload stored for `ref`, or None."""
+        if self._use_sheets():
+            ws = self._sheets.worksheet(
+                settings.GOOGLE_CAMPAIGNS_SHEET_TAB, create_cols=CAMPAIGN_COLUMNS
+            )
+            try:
+                refs = ws.col_values(1)
+                if ref not in refs:
+                    return None
+                row = ws.row_values(refs.index(ref) + 1)
+            except Exception:
+                self._sheets.invalidate(settings.GOOGLE_CAMPAIGNS_SHEET_TAB)
+                raise
+            return row[CAMPAIGN_COLUMNS.index("payload")]
+
+        if os.path.exists(settings.CAMPAIGN_CSV_PATH):
+            with open(settings.CAMPAIGN_CSV_PATH, newline="") as f:
+                for row in csv.DictReader(f):
+                    if row["campaign_ref"] == ref:
+                        return row["payload"]
+        return None
+
+    def put(self, payload: dict) -> str:
+        """Persist `payload` (if not already stored) and return its ref."""
+        ref = campaign_ref(payload)
+        with self._lock:
+            if ref in self._cache:
+                return ref
+        # Idempotent across retries and repeat campaigns: same content, same row
+        if self._load(ref) is None:
+            values = [ref, int(time.time()), json.dumps(payload, sort_keys=True)]
+            if self._use_sheets():
+                ws = self._sheets.worksheet(
+                    settings.GOOGLE_CAMPAIGNS_SHEET_TAB, create_cols=CAMPAIGN_COLUMNS
+                )
+                try:
+                    ws.append_row(values)
+                except Exception:
+                    self._sheets.invalidate(settings.GOOGLE_CAMPAIGNS_SHEET_TAB)
+                    raise
+            else:
+                header = not os.path.exists(settings.CAMPAIGN_CSV_PATH)
+                with open(settings.CAMPAIGN_CSV_PATH, "a", newline="") as f:
+                    writer = csv.writer(f)
+                    if header:
+                        writer.writerow(CAMPAIGN_COLUMNS)
+                    writer.writerow(values)
+        self._remember(ref, payload)
+        return ref
+
+    def get(self, ref: str) -> dict:
+        """The payload stored under `ref`; KeyError if there is none."""
+        with self._lock:
+            payload = self._cache.get(ref)
+            if payload is not None:
+                self._cache.move_to_end(ref)
+                self.hits += 1
+                return payload
+            self.misses += 1
+
+        raw = self._load(ref)
+        if raw is None:
+            raise KeyError(f"Unknown campaign_ref {ref}")
+        payload = json.loads(raw)
+        self._remember(ref, payload)
+        return payload
+
+    def stats(self) -> dict:
+        return {"cached": len(self._cache), "hits": self.hits, "misses": self.misses}
+
+
+_store: CampaignStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_campaign_store() -> CampaignStore:
+    """The process-wide CampaignStore, created on first use."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = CampaignStore(cache_size=settings.CAMPAIGN_CACHE_SIZE)
+    return _store
+
+
+def _store_stats() -> dict:
+    return _store.stats() if _store is not None else {}
+
+
+register_stats("campaign_store", _store_stats)
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+
+from .settings import settings
+from .metrics import register_stats
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpen(Exception):
+    """Raised by CircuitBreaker.before_call while calls are being refused."""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} circuit open; retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Per-process breaker for an upstream. After `failure_threshold`
+    consecutive failures it opens and refuses calls for `reset_timeout`
+    seconds, then lets a single probe through (half-open): success closes
+    it, failure opens it again.
+
+    Only failures that say the upstream is unhealthy (5xx, 429, network)
+    should be recorded; a 4xx answer means it is up.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._probe_started: float | None = None
+        self.opens = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at < self.reset_timeout:
+            return "open"
+        return "half_open"
+
+    def before_call(self) -> None:
+        """Raise CircuitOpen unless a call may go through now."""
+        with self._lock:
+            if self._opened_at is None:
+                return
+            now = time.monotonic()
+            remaining = self._opened_at + self.reset_timeout - now
+            # A probe that never reported back (e.g. cancelled) is replaced
+            # after another reset_timeout
+            probe_stale = (
+                self._probe_started is None or now - self._probe_started >= self.reset_timeout
+            )
+            if remaining <= 0 and probe_stale:
+                self._probe_started = now  # this caller is the half-open probe
+                return
+            self.rejected += 1
+            raise CircuitOpen(self.name, max(remaining, 1.0))
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info("%s circuit closed", self.name)
+            self._failures = 0
+            self._opened_at = None
+            self._probe_started = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._probe_started is not None or (
+                self._opened_at is None and self._failures >= self.failure_threshold
+            ):
+                if self._opened_at is None:
+                    self.opens += 1
+                    logger.warning(
+                        "%s circuit opened after %d consecutive failures",
+                        self.name, self._failures,
+                    )
+                self._opened_at = time.monotonic()
+                self._probe_started = None
+
+    def stats(self) -> dict:
+        return {
+            "state": {"closed": 0, "half_open": 1, "open": 2}[self.state],
+            "consecutive_failures": self._failures,
+            "opens": self.opens,
+            "rejected": self.rejected,
+        }
+
+
+sendgrid_breaker = CircuitBreaker(
+    "sendgrid",
+    failure_threshold=settings.SENDGRID_BREAKER_FAILURES,
+    reset_timeout=settings.SENDGRID_BREAKER_RESET_SECONDS,
+)
+register_stats("circuit_sendgrid", sendgrid_breaker.stats)
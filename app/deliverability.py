@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Protocol
+
+from .settings import settings
+from .metrics import register_stats
+
+logger = logging.getLogger(__name__)
+
+# ApplicationError type raised by send activities for undeliverable addresses
+INVALID_ADDRESS_ERROR = "InvalidAddress"
+
+
+class MailDomainResolver(Protocol):
+    def accepts_mail(self, domain: str) -> bool | None:
+        """True if `domain` can receive mail, False if not, None if unknown."""
+
+
+class DnsResolver:
+    """
+    MX lookup via dnspython, falling back to A/AAAA (RFC 5321 implicit MX).
+    A null MX ("0 .") or a non-existent domain means no mail; DNS timeouts
+    and server failures are reported as unknown.
+    """
+
+    def __init__(self, timeout: float = 3.0):
+        import dns.resolver
+
+        self._dns = dns
+        self._resolver = dns.resolver.Resolver()
+        self._resolver.lifetime = timeout
+
+    def _answer(self, domain: str, rdtype: str):
+        try:
+            return self._resolver.resolve(domain, rdtype)
+        except self._dns.resolver.NoAnswer:
+            return None
+
+    def accepts_mail(self, domain: str) -> bool | None:
+        try:
+            mx = self._answer(domain, "MX")
+            if mx is not None:
+                hosts = [r.exchange.to_text() for r in mx]
+                return any(h not in (".", "") for h in hosts)
+            return any(self._answer(domain, t) is not None for t in ("A", "AAAA"))
+        except self._dns.resolver.NXDOMAIN:
+            return False
+        except self._dns.exception.DNSException as e:
+            logger.debug("MX lookup for %s inconclusive: %s", domain, e)
+            return None
+
+
+class StaticResolver:
+    """Resolver stub answering from a dict; for tests and offline runs."""
+
+    def __init__(self, domains: dict[str, bool] | None = None, default: bool | None = True):
+        self.domains = {k.lower(): v for k, v in (domains or {}).items()}
+        self.default = default
+
+    def accepts_mail(self, domain: str) -> bool | None:
+        return self.domains.get(domain.lower(), self.default)
+
+
+class AddressValidator:
+    """
+    Syntax and domain check for recipient addresses, run before SendGrid
+    is ever called.
+
+    Domain answers are kept in a process-wide TTL cache, since a roster's
+    thousands of members usually share a handful of domains. Inconclusive
+    lookups are not cached and the address is given the benefit of the doubt.
+    """
+
+    def __init__(
+        self,
+        resolver: MailDomainResolver | None = None,
+        check_deliverability: bool = True,
+        cache_size: int = 10_000,
+        cache_ttl: float = 3600.0,
+        dns_timeout: float = 3.0,
+    ):
+        from cachetools import TTLCache
+
+        self._resolver = resolver
+        self._dns_timeout = dns_timeout
+        self.check_deliverability = check_deliverability
+        self._cache: TTLCache[str, bool] = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        self._lock = threading.Lock()
+        self.cache_hits = 0
+        self.lookups = 0
+        self.rejected = 0
+
+    @classmethod
+    def from_settings(cls) -> "AddressValidator":
+        return cls(
+            check_deliverability=settings.EMAIL_CHECK_DELIVERABILITY,
+            cache_size=settings.EMAIL_MX_CACHE_SIZE,
+            cache_ttl=settings.EMAIL_MX_CACHE_TTL_SECONDS,
+            dns_timeout=settings.EMAIL_DNS_TIMEOUT_SECONDS,
+        )
+
+    def use_resolver(self, resolver: MailDomainResolver) -> None:
+        """Swap the domain resolver (e.g. for a StaticResolver) and drop cached answers."""
+        with self._lock:
+            self._resolver = resolver
+            self._cache.clear()
+
+    def _domain_accepts_mail(self, domain: str) -> bool | None:
+        with self._lock:
+            cached = self._cache.get(domain)
+            if cached is not None:
+                self.cache_hits += 1
+                return cached
+            if self._resolver is None:
+                self._resolver = DnsResolver(self._dns_timeout)
+            resolver = self._resolver
+            self.lookups += 1
+
+        # Resolve outside the lock; a concurrent miss on the same domain
+        # just resolves it twice
+        answer = resolver.accepts_mail(domain)
+        if answer is not None:
+            with self._lock:
+                self._cache[domain] = answer
+        return answer
+
+    def check(self, email: str) -> str | None:
+        """None if `email` looks deliverable, otherwise the reason it is not."""
+        from email_validator import EmailNotValidError, validate_email
+
+        try:
+            parsed = validate_email(email, check_deliverability=False)
+        except EmailNotValidError as e:
+            self.rejected += 1
+            return str(e)
+
+        if self.check_deliverability and self._domain_accepts_mail(parsed.ascii_domain) is False:
+            self.rejected += 1
+            return f"Domain {parsed.ascii_domain} does not accept email"
+        return None
+
+    def stats(self) -> dict:
+        return {
+            "cached_domains": len(self._cache),
+            "cache_hits": self.cache_hits,
+            "lookups": self.lookups,
+            "rejected": self.rejected,
+        }
+
+
+_validator: AddressValidator | None = None
+_validator_lock = threading.Lock()
+
+
+def get_address_validator() -> AddressValidator:
+    """The process-wide AddressValidator, created on first use."""
+    global _validator
+    if _validator is None:
+        with _validator_lock:
+            if _validator is None:
+                _validator = AddressValidator.from_settings()
+    return _validator
+
+
+def _validator_stats() -> dict:
+    return _validator.stats() if _validator is not None else {}
+
+
+register_stats("address_validation", _validator_stats)
@@ -1,32 +1,65 @@
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail, Email, To
+from __future__ import annotations
+
+import asyncio
+import ssl
+import threading
+from typing import TYPE_CHECKING
+
+import certifi
 from .settings import settings
+from .ratelimit import RateLimitBusy, parse_retry_after, sendgrid_limiter
+from .circuit import CircuitOpen, sendgrid_breaker
+from .metrics import record_upstream_error, track_upstream
 
-import urllib3
-from python_http_client import client
+if TYPE_CHECKING:
+    import httpx
+    from sendgrid.helpers.mail import Mail
 
 
-import os
-import certifi
+class SendGridError(Exception):
+    """A classified SendGrid failure; `retryable` says whether to try again."""
+
+    retryable = True
+
+    def __init__(
+        self,
+        message: str,
+        status_code: int | None = None,
+        retry_after: float | None = None,
+    ):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class PermanentSendError(SendGridError):
+    """SendGrid rejected the request itself (bad address, template, auth...)."""
+
+    retryable = False
 
-os.environ["REQUESTS_CA_BUNDLE"] = certifi.where()
-os.environ["SSL_CERT_FILE"] = certifi.where()
 
+class TransientSendError(SendGridError):
+    """SendGrid is unavailable or throttling (5xx, 408, 429, network)."""
 
 
-# Disable SSL verification warnings
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+class CircuitOpenError(TransientSendError):
+    """Refused locally: the SendGrid circuit breaker is open."""
 
 
-class UnsafeSendGridAPIClient(SendGridAPIClient):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
+def classify_response(status_code: int, body: str, retry_after: float | None) -> SendGridError:
+    message = f"SendGrid status {status_code}: {body[:500]}" if body else f"SendGrid status {status_code}"
+    if status_code in (408, 429) or status_code >= 500:
+        return TransientSendError(message, status_code, retry_after)
+    return PermanentSendError(message, status_code)
 
-        # Replace the pool manager with one that skips certificate validation
-        if self.client and hasattr(self.client, '_request'):
-            self.client._request._http = urllib3.PoolManager(cert_reqs='CERT_NONE')
 
 class Emailer:
+    """
+    SendGrid v3 client. Failures raise PermanentSendError (do not retry) or
+    TransientSendError (retry later); while the process-wide circuit
+    breaker is open, sends fail fast with CircuitOpenError.
+    """
+
     def __init__(self):
         if not settings.SENDGRID_API_KEY:
             raise RuntimeError("SENDGRID_API_KEY is not set")
@@ -35,10 +68,92 @@ class Emailer:
         if not settings.SENDGRID_FROM_EMAIL:
             raise RuntimeError("SENDGRID_FROM_EMAIL is not set")
 
-        # Use our unsafe client that skips SSL cert check
-        self.client = UnsafeSendGridAPIClient(settings.SENDGRID_API_KEY)
+        # Created lazily so it binds to the running event loop
+        self._http: httpx.AsyncClient | None = None
+
+    def _client(self) -> httpx.AsyncClient:
+        if self._http is None:
+            import httpx
+
+            self._http = httpx.AsyncClient(
+                base_url=settings.SENDGRID_API_BASE_URL,
+                headers={
+                    "Authorization": f"Bearer {settings.SENDGRID_API_KEY}",
+                    "Content-Type": "application/json",
+                },
+                # Keep-alive pool shared by every in-flight send in this process
+                limits=httpx.Limits(
+                    max_connections=settings.SENDGRID_POOL_SIZE,
+                    max_keepalive_connections=settings.SENDGRID_POOL_SIZE,
+                    keepalive_expiry=settings.SENDGRID_KEEPALIVE_SECONDS,
+                ),
+                timeout=settings.SENDGRID_TIMEOUT_SECONDS,
+                verify=ssl.create_default_context(cafile=certifi.where()),
+            )
+        return self._http
+
+    async def _post(self, msg: Mail) -> httpx.Response:
+        import httpx
+
+        try:
+            sendgrid_breaker.before_call()
+        except CircuitOpen as e:
+            raise CircuitOpenError(str(e), retry_after=e.retry_after) from None
+
+        try:
+            await sendgrid_limiter.acquire()
+        except RateLimitBusy as e:
+            raise TransientSendError(str(e), retry_after=e.retry_after) from None
+        try:
+            with track_upstream("sendgrid", "mail_send"):
+                resp = await self._client().post("/v3/mail/send", json=msg.get())
+        except httpx.HTTPError as e:
+            record_upstream_error("sendgrid", None)
+            sendgrid_breaker.record_failure()
+            raise TransientSendError(f"SendGrid request failed: {e!r}") from e
+
+        if resp.is_success:
+            await sendgrid_limiter.asucceeded()
+            sendgrid_breaker.record_success()
+            return resp
+
+        record_upstream_error("sendgrid", resp.status_code)
+        retry_after = None
+        if resp.status_code == 429:
+            retry_after = parse_retry_after(resp.headers)
+            await sendgrid_limiter.athrottle(retry_after)
+        error = classify_response(resp.status_code, resp.text, retry_after)
+        if error.retryable:
+            sendgrid_breaker.record_failure()
+        else:
+            # A 4xx answer still means SendGrid is up
+            sendgrid_breaker.record_success()
+        raise error
+
+    async def aclose(self) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    def warm_up(self) -> None:
+        """Do the first send's one-off work now: imports, TLS context, pool."""
+        import sendgrid.helpers.mail  # noqa: F401
+
+        self._client()
+
+    async def send(
+        self,
+        to_email: str,
+        dynamic_template_data: dict,
+        custom_args: dict[str, str] | None = None,
+    ) -> str:
+        """
+        Send one templated email and return the SendGrid status code.
+        `custom_args` (e.g. the sending workflow ids) are attached to the message
+        and come back on SendGrid's event webhooks.
+        """
+        from sendgrid.helpers.mail import CustomArg, Mail, Email, To
 
-    def send(self, to_email: str, dynamic_template_data: dict) -> str:
         msg = Mail(
             from_email=Email(
                 settings.SENDGRID_FROM_EMAIL,
@@ -48,9 +163,99 @@ class Emailer:
         )
         msg.template_id = settings.SENDGRID_TEMPLATE_ID
         msg.dynamic_template_data = dynamic_template_data
+        for key, value in (custom_args or {}).items():
+            msg.custom_arg = CustomArg(key, str(value))
 
-        resp = self.client.send(msg)
+        resp = await self._post(msg)
         return f"{resp.status_code}"
 
+    async def send_batch(self, recipients: list[dict]) -> list[dict]:
+        """
+        Send to many recipients using one personalization per recipient.
+
+        Each recipient is {"email", "dynamic_template_data", "template_id"?,
+        "custom_args"?}.
+        Recipients sharing a template go out together, up to
+        SENDGRID_MAX_PERSONALIZATIONS per request. Returns one
+        {"email", "status", "sendgrid_status", "message"} per recipient, in
+        input order; a failed request marks all of its recipients failed,
+        with "error_type" set to the SendGridError subclass name.
+        """
+        from sendgrid.helpers.mail import CustomArg, Mail, Email, To, Personalization
+
+        results: list[dict | None] = [None] * len(recipients)
+
+        by_template: dict[str, list[int]] = {}
+        for i, r in enumerate(recipients):
+            template_id = r.get("template_id") or settings.SENDGRID_TEMPLATE_ID
+            by_template.setdefault(template_id, []).append(i)
+
+        size = settings.SENDGRID_MAX_PERSONALIZATIONS
+        chunks = [
+            (template_id, indexes[start:start + size])
+            for template_id, indexes in by_template.items()
+            for start in range(0, len(indexes), size)
+        ]
+
+        async def send_chunk(template_id: str, chunk: list[int]) -> None:
+            msg = Mail(
+                from_email=Email(
+                    settings.SENDGRID_FROM_EMAIL,
+                    settings.SENDGRID_FROM_NAME,
+                ),
+            )
+            msg.template_id = template_id
+            for pos, i in enumerate(chunk):
+                p = Personalization()
+                p.add_to(To(recipients[i]["email"]))
+                p.dynamic_template_data = recipients[i].get("dynamic_template_data") or {}
+                for key, value in (recipients[i].get("custom_args") or {}).items():
+                    p.add_custom_arg(CustomArg(key, str(value)))
+                msg.add_personalization(p, index=pos)
+
+            try:
+                resp = await self._post(msg)
+                outcome = {
+                    "status": "sent",
+                    "sendgrid_status": f"{resp.status_code}",
+                    "message": f"SendGrid status {resp.status_code}",
+                }
+            except SendGridError as e:
+                outcome = {
+                    "status": "failed",
+                    "sendgrid_status": f"{e.status_code or ''}",
+                    "message": str(e),
+                    "error_type": type(e).__name__,
+                }
+            except Exception as e:
+                outcome = {"status": "failed", "sendgrid_status": "", "message": str(e)}
+
+            for i in chunk:
+                results[i] = {"email": recipients[i]["email"], **outcome}
+
+        await asyncio.gather(*(send_chunk(t, c) for t, c in chunks))
+        return results
+
+
+_emailer: Emailer | None = None
+_emailer_lock = threading.Lock()
+
+
+def get_emailer() -> Emailer:
+    """
+    The process-wide Emailer, created on first use so that importing this
+    module (e.g. from the API, via the workflow definitions) neither needs
+    SendGrid settings nor pays for httpx/sendgrid imports.
+    """
+    global _emailer
+    if _emailer is None:
+        with _emailer_lock:
+            if _emailer is None:
+                _emailer = Emailer()
+    return _emailer
+
 
-emailer = Emailer()
+async def close_emailer() -> None:
+    """Close the shared Emailer's connection pool, if one was ever created."""
+    if _emailer is not None:
+        await _emailer.aclose()
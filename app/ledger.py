@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+from typing import Iterator
+
+from .settings import settings
+from .metrics import register_stats
+
+LEDGER_COLUMNS = [
+    "ts_epoch",
+    "ts_iso",
+    "campaign_id",
+    "campaign_ref",
+    "workflow_id",
+    "run_id",
+    "member_id",
+    "email",
+    "status",
+    "message",
+    "sendgrid_status",
+    "event_id",
+]
+
+# Columns GET /deliveries can filter on; each has an index
+FILTER_COLUMNS = ("campaign_id", "workflow_id", "member_id", "email", "status")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS deliveries (
+    id INTEGER PRIMARY KEY,
+    ts_epoch INTEGER NOT NULL,
+    ts_iso TEXT NOT NULL,
+    campaign_id TEXT NOT NULL DEFAULT '',
+    campaign_ref TEXT NOT NULL DEFAULT '',
+    workflow_id TEXT NOT NULL,
+    run_id TEXT NOT NULL,
+    member_id TEXT NOT NULL,
+    email TEXT NOT NULL,
+    status TEXT NOT NULL,
+    message TEXT NOT NULL DEFAULT '',
+    sendgrid_status TEXT NOT NULL DEFAULT '',
+    event_id TEXT NOT NULL UNIQUE
+);
+CREATE INDEX IF NOT EXISTS deliveries_workflow_id ON deliveries (workflow_id);
+CREATE INDEX IF NOT EXISTS deliveries_member_id ON deliveries (member_id);
+CREATE INDEX IF NOT EXISTS deliveries_email ON deliveries (email);
+CREATE INDEX IF NOT EXISTS deliveries_status ON deliveries (status);
+CREATE INDEX IF NOT EXISTS deliveries_campaign_status ON deliveries (campaign_id, status);
+"""
+
+
+class DeliveryLedger:
+    """
+    Delivery log in a local SQLite file (LOG_BACKEND=sqlite), indexed so
+    "what happened to member X" or "how many sent in campaign Y" are index
+    lookups rather than scans of the whole log.
+
+    The database runs in WAL mode, so the API can read while workers
+    write; each flush of the log sink is one transaction. event_id is
+    unique, so a retried flush never duplicates a row.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._schema_ready = False
+        self.inserted = 0
+        self.duplicates = 0
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections are per thread; activities run in a pool
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30.0)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            if not self._schema_ready:
+                conn.executescript(_SCHEMA)
+                columns = {r[1] for r in conn.execute("PRAGMA table_info(deliveries)")}
+                if "campaign_ref" not in columns:
+                    # Ledgers created before rows carried their payload's ref
+                    conn.execute(
+                        "ALTER TABLE deliveries ADD COLUMN campaign_ref TEXT NOT NULL DEFAULT ''"
+                    )
+                self._schema_ready = True
+            self._local.conn = conn
+        return conn
+
+    def append(self, rows: list[dict]) -> int:
+        """Insert rows (LEDGER_COLUMNS keys) in one transaction; returns how many were new."""
+        if not rows:
+            return 0
+        placeholders = ", ".join("?" for _ in LEDGER_COLUMNS)
+        sql = (
+            f"INSERT OR IGNORE INTO deliveries ({', '.join(LEDGER_COLUMNS)}) "
+            f"VALUES ({placeholders})"
+        )
+        conn = self._conn()
+        with self._write_lock, conn:
+            before = conn.total_changes
+            conn.executemany(sql, ([row.get(c, "") for c in LEDGER_COLUMNS] for row in rows))
+            added = conn.total_changes - before
+        self.inserted += added
+        self.duplicates += len(rows) - added
+        return added
+
+    @staticmethod
+    def _where(filters: dict[str, str | None]) -> tuple[str, list]:
+        clauses, params = [], []
+        for column in FILTER_COLUMNS:
+            value = filters.get(column)
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def query(self, limit: int = 100, before_id: int | None = None, **filters) -> list[dict]:
+        """
+        Matching rows, newest first. Page with `before_id` set to the
+        smallest "id" of the previous page.
+        """
+        where, params = self._where(filters)
+        if before_id is not None:
+            where += (" AND" if where else " WHERE") + " id < ?"
+            params.append(before_id)
+        rows = self._conn().execute(
+            f"SELECT id, {', '.join(LEDGER_COLUMNS)} FROM deliveries{where} "
+            "ORDER BY id DESC LIMIT ?",
+            [*params, limit],
+        )
+        return [dict(r) for r in rows]
+
+    def counts(self, **filters) -> dict[str, int]:
+        """Row count per status for the matching rows."""
+        where, params = self._where(filters)
+        rows = self._conn().execute(
+            f"SELECT status, COUNT(*) FROM deliveries{where} GROUP BY status", params
+        )
+        return {status: n for status, n in rows}
+
+    def iter_outcomes(self, batch_size: int = 5000) -> Iterator[list[dict]]:
+        """
+        Rows that carry a campaign_ref, oldest first and in batches of
+        {"campaign_ref", "member_id", "email", "status"}; what the
+        suppression index is rebuilt from.
+        """
+        last_id = 0
+        conn = self._conn()
+        while True:
+            rows = conn.execute(
+                "SELECT id, campaign_ref, member_id, email, status FROM deliveries "
+                "WHERE id > ? AND campaign_ref != '' ORDER BY id LIMIT ?",
+                [last_id, batch_size],
+            ).fetchall()
+            if not rows:
+                return
+            last_id = rows[-1]["id"]
+            yield [dict(r) for r in rows]
+
+    def stats(self) -> dict:
+        return {"inserted": self.inserted, "duplicates": self.duplicates}
+
+
+_ledger: DeliveryLedger | None = None
+_ledger_lock = threading.Lock()
+
+
+def get_ledger() -> DeliveryLedger:
+    """The process-wide DeliveryLedger at LOG_SQLITE_PATH, opened on first use."""
+    global _ledger
+    if _ledger is None:
+        with _ledger_lock:
+            if _ledger is None:
+                _ledger = DeliveryLedger(settings.LOG_SQLITE_PATH)
+    return _ledger
+
+
+def _ledger_stats() -> dict:
+    return _ledger.stats() if _ledger is not None else {}
+
+
+register_stats("ledger", _ledger_stats)
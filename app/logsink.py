@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+
+from .settings import settings
+from .ratelimit import RateLimitBusy
+from .sheets import get_sheet_client, log_event_id
+from .suppression import get_suppression_index
+from .metrics import register_stats
+
+logger = logging.getLogger(__name__)
+
+# How many flushed event ids to remember for dropping late duplicates
+_RECENT_EVENT_IDS = 10_000
+
+
+class DeliveryLogSink:
+    """
+    Buffers delivery log rows in the worker and writes them with a single
+    append per flush (group commit).
+
+    `write()` only returns once its row has been flushed, so a log activity
+    still completes only after its row is durable; concurrent activities
+    share one Sheets call. Flushed outcomes also feed the suppression
+    index. A flush happens when LOG_FLUSH_MAX_ROWS rows are
+    buffered or LOG_FLUSH_INTERVAL_SECONDS has passed. Failed flushes keep
+    their rows at the head of the buffer and are retried with dedupe on.
+    """
+
+    def __init__(self):
+        self._pending: list[tuple[dict | None, asyncio.Future]] = []
+        self._queued_ids: set[str] = set()
+        self._recent_ids: OrderedDict[str, None] = OrderedDict()
+        self._wakeup: asyncio.Event | None = None
+        self._flush_lock: asyncio.Lock | None = None
+        self._task: asyncio.Task | None = None
+        self._closing = False
+        self._dedupe_next = False
+
+        self.flushes = 0
+        self.flush_failures = 0
+        self.rows_flushed = 0
+        self.last_flush_seconds = 0.0
+        self.max_flush_seconds = 0.0
+
+    def _ensure_started(self) -> None:
+        if self._task is None or self._task.done():
+            self._closing = False
+            self._wakeup = asyncio.Event()
+            self._flush_lock = asyncio.Lock()
+            self._task = asyncio.create_task(self._run())
+
+    async def write(self, row: dict) -> None:
+        """Buffer a row and wait until it has been flushed."""
+        self._ensure_started()
+        event_id = row.get("event_id") or log_event_id(row)
+        if event_id in self._recent_ids:
+            # Retried activity whose row already made it to the log
+            return
+
+        fut = asyncio.get_running_loop().create_future()
+        if event_id in self._queued_ids:
+            # Retried activity whose row is still buffered: wait on a new
+            # future, but don't buffer the row twice
+            self._pending.append((None, fut))
+        else:
+            self._queued_ids.add(event_id)
+            self._pending.append(({**row, "event_id": event_id}, fut))
+
+        if len(self._pending) >= settings.LOG_FLUSH_MAX_ROWS:
+            self._wakeup.set()
+        await fut
+
+    async def _run(self) -> None:
+        while not self._closing:
+            try:
+                await asyncio.wait_for(
+                    self._wakeup.wait(), timeout=settings.LOG_FLUSH_INTERVAL_SECONDS
+                )
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.warning("Delivery log flush failed, will retry: %s", e)
+
+    async def flush(self) -> None:
+        """Write every buffered row with one append; raises on failure."""
+        if self._flush_lock is None:
+            return
+        async with self._flush_lock:
+            batch = list(self._pending)
+            rows = [row for row, _ in batch if row is not None]
+            if not batch:
+                return
+
+            start = time.perf_counter()
+            dedupe = self._dedupe_next
+            # Until the append is known to have landed (or not), including
+            # when this flush is cancelled mid-write, the next one dedupes
+            self._dedupe_next = True
+            try:
+                await asyncio.to_thread(get_sheet_client().append_log_rows, rows, dedupe)
+            except RateLimitBusy:
+                # Refused before anything was written
+                self._dedupe_next = dedupe
+                self.flush_failures += 1
+                raise
+            except Exception:
+                self.flush_failures += 1
+                raise
+            elapsed = time.perf_counter() - start
+
+            self._dedupe_next = False
+            index = get_suppression_index()
+            if index is not None:
+                try:
+                    await asyncio.to_thread(index.record, rows)
+                except Exception as e:
+                    # The log is durable; a missed outcome only means a possible resend
+                    logger.warning("Suppression index update failed: %s", e)
+
+            del self._pending[:len(batch)]
+            for row in rows:
+                self._queued_ids.discard(row["event_id"])
+                self._recent_ids[row["event_id"]] = None
+            while len(self._recent_ids) > _RECENT_EVENT_IDS:
+                self._recent_ids.popitem(last=False)
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_result(None)
+
+            self.flushes += 1
+            self.rows_flushed += len(rows)
+            self.last_flush_seconds = elapsed
+            self.max_flush_seconds = max(self.max_flush_seconds, elapsed)
+
+    async def close(self, attempts: int = 3) -> None:
+        """Stop the background flusher and flush what is left."""
+        if self._task is not None:
+            # Let an in-flight flush finish rather than cancelling it mid-write
+            self._closing = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+
+        for attempt in range(attempts):
+            try:
+                await self.flush()
+                break
+            except Exception as e:
+                logger.warning("Final delivery log flush failed (attempt %d): %s", attempt + 1, e)
+                await asyncio.sleep(2 ** attempt)
+
+        if self._pending:
+            # Their activities never completed, so Temporal will retry them
+            logger.error(
+                "Leaving %d unflushed delivery log rows to activity retries", len(self._pending)
+            )
+
+    def stats(self) -> dict:
+        return {
+            "buffered": len(self._pending),
+            "flushes": self.flushes,
+            "flush_failures": self.flush_failures,
+            "rows_flushed": self.rows_flushed,
+            "last_flush_seconds": self.last_flush_seconds,
+            "max_flush_seconds": self.max_flush_seconds,
+        }
+
+
+log_sink = DeliveryLogSink()
+register_stats("log_sink", log_sink.stats)
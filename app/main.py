@@ -1,15 +1,48 @@
-from fastapi import FastAPI, Depends
-from fastapi.responses import JSONResponse
+import time
+
+_IMPORT_STARTED = time.perf_counter()
+
+import asyncio
+import json
+from typing import AsyncIterator
+from uuid import uuid4
+
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 
-from temporalio.client import Client
+from temporalio.client import Client, WorkflowExecutionStatus, WorkflowHandle
+from temporalio.service import RPCError, RPCStatusCode
 
 from app.settings import settings
-from app.models import NotifyRequest, NotifyResponse
-from app.workflows import NotifyMemberWorkflow
+from app.models import (
+    CampaignProgress,
+    CampaignResponse,
+    DeliveriesResponse,
+    DeliveryRecord,
+    DeliverySummary,
+    NotifyRequest,
+    NotifyResponse,
+)
+from app.workflows import NotifyCampaignWorkflow
 from app.auth import require_auth
-from app.utils import get_members_from_sheet  # we'll add this helper
+from app.metrics import (
+    API_IN_FLIGHT,
+    API_SECONDS,
+    WORKFLOW_START_SECONDS,
+    render_latest,
+    temporal_runtime,
+)
+from app.warmup import startup_report
+from app.ledger import DeliveryLedger, get_ledger
+from app.webhooks import (
+    SIGNATURE_HEADER,
+    TIMESTAMP_HEADER,
+    WebhookSignatureError,
+    verify_signature,
+    webhook_ingestor,
+)
 
 app = FastAPI(
     title="Member Email API",
@@ -31,18 +64,49 @@ app.add_middleware(
 security = HTTPBearer()
 
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    API_IN_FLIGHT.inc()
+    start = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        # label by route template, not raw path, to keep cardinality bounded
+        route = request.scope.get("route")
+        API_SECONDS.labels(
+            request.method, getattr(route, "path", "unmatched"), str(status_code)
+        ).observe(time.perf_counter() - start)
+        API_IN_FLIGHT.dec()
+
+
+startup = startup_report("api", _IMPORT_STARTED)
+
+
 @app.on_event("startup")
 async def startup_event():
     print("Connecting to Temporal...")
-    app.state.temporal = await Client.connect(
-        "us-east-2.aws.api.temporal.io:7233",
-        namespace=settings.TEMPORAL_NAMESPACE,
-        api_key=settings.TEMPORAL_API_KEY,
-        tls=True,
+    app.state.temporal = await startup.timed(
+        "temporal_connect",
+        Client.connect(
+            "us-east-2.aws.api.temporal.io:7233",
+            namespace=settings.TEMPORAL_NAMESPACE,
+            api_key=settings.TEMPORAL_API_KEY,
+            tls=True,
+            runtime=temporal_runtime(settings.API_TEMPORAL_METRICS_ADDRESS),
+        ),
     )
+    startup.ready()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await webhook_ingestor.close()
 
 
-@app.post("/notify", response_model=list[NotifyResponse])
+@app.post("/notify", response_model=CampaignResponse, status_code=status.HTTP_202_ACCEPTED)
 async def notify(
     req: NotifyRequest,
     credentials: HTTPAuthorizationCredentials = Depends(security),
@@ -50,16 +114,7 @@ async def notify(
     await require_auth(authorization=f"Bearer {credentials.credentials}")
     client: Client = app.state.temporal
 
-    # 1. fetch members from the given tab
-    members = get_members_from_sheet(
-        sheet_id=settings.GOOGLE_SHEET_ID,
-        sheet_tab=req.sheet_tab,
-        service_account_path=settings.GOOGLE_SA_JSON_PATH,
-    )
-
-    responses: list[NotifyResponse] = []
-
-    # 2. shared template data
+    # 1. shared template data
     template_data = {
         "brand_name": req.brand_name,
         "app_name": req.app_name,
@@ -70,31 +125,248 @@ async def notify(
     if req.cta_url:
         template_data["cta_url"] = str(req.cta_url)
 
-    # 3. start workflows for each member
-    for member in members:
-        member_id = member.get("member_id")
-        email = member.get("email")
-
-        if not member_id or not email:
-            continue  # skip incomplete rows
-
-        print(f"Starting workflow for {member_id} - {email}")
+    # 2. start a single campaign workflow; it pages through the tab and
+    #    fans out one NotifyMemberWorkflow per member
+    campaign_id = f"notify-campaign-{req.sheet_tab}-{uuid4().hex[:12]}"
+    # pacing, if any: spread over a window and/or cap sends per domain
+    pacing = {
+        "window_minutes": settings.CAMPAIGN_SEND_WINDOW_MINUTES
+        if req.send_window_minutes is None else req.send_window_minutes,
+        "domain_per_minute": settings.CAMPAIGN_DOMAIN_RATE_PER_MINUTE
+        if req.domain_rate_per_minute is None else req.domain_rate_per_minute,
+    }
+    print(f"Starting campaign {campaign_id}")
 
-        try:
+    try:
+        with WORKFLOW_START_SECONDS.labels("NotifyCampaignWorkflow").time():
             handle = await client.start_workflow(
-                NotifyMemberWorkflow.run,
-                id=f"notify-{member_id}-{email}",
+                NotifyCampaignWorkflow.run,
+                id=campaign_id,
                 task_queue=settings.TASK_QUEUE,
-                args=[member_id, email, template_data],
-            )
-            responses.append(
-                NotifyResponse(status="QUEUED", run_id=handle.first_execution_run_id)
+                args=[
+                    req.sheet_tab,
+                    template_data,
+                    settings.CAMPAIGN_PAGE_SIZE,
+                    settings.CAMPAIGN_MAX_CONCURRENT_STARTS,
+                    req.batch_send,
+                    0,  # offset
+                    None,  # progress
+                    None,  # campaign_ref
+                    settings.CAMPAIGN_LEAN_MEMBERS,
+                    req.resend_statuses,
+                    pacing if any(pacing.values()) else None,
+                    req.resend_all,
+                ],
             )
+    except Exception as e:
+        print("Campaign start failed for", req.sheet_tab, ":", e)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Campaign start failed: {e}",
+        )
+
+    # The campaign workflow id doubles as the job id for GET /notify/{job_id}
+    queued = CampaignResponse(
+        status="QUEUED",
+        campaign_id=handle.id,
+        run_id=handle.first_execution_run_id,
+    )
+    if req.stream:
+        return StreamingResponse(
+            stream_campaign(handle, queued),
+            status_code=status.HTTP_202_ACCEPTED,
+            media_type="application/x-ndjson",
+        )
+    return queued
+
+
+def _ndjson(kind: str, model) -> bytes:
+    return (json.dumps({"type": kind, **model.model_dump(exclude_none=True)}) + "\n").encode()
+
+
+async def stream_campaign(handle: WorkflowHandle, queued: CampaignResponse) -> AsyncIterator[bytes]:
+    """
+    NDJSON for a streaming /notify: the queued campaign, one "member" line
+    per dispatch outcome as the campaign reports it, then a "summary" line
+    once every member has been dispatched. Events are paged out of the
+    campaign's bounded buffer, so memory stays flat whatever the roster
+    size; a "gap" line counts any that were missed.
+
+    If the campaign closes before dispatching everything (failed,
+    terminated, timed out), an "error" line with its status precedes the
+    summary.
+    """
+    yield _ndjson("campaign", queued)
+
+    cursor = 0
+    while True:
+        try:
+            batch = await handle.query(NotifyCampaignWorkflow.events, cursor)
         except Exception as e:
-            print("Workflow start failed for", email, ":", e)
-            responses.append(NotifyResponse(status="FAILED", run_id=None, message=str(e)))
+            yield _ndjson("error", NotifyResponse(status="STREAM_FAILED", message=str(e)))
+            return
+
+        if batch["dropped"]:
+            yield (json.dumps({"type": "gap", "dropped": batch["dropped"]}) + "\n").encode()
+        for event in batch["events"]:
+            event.pop("seq", None)
+            yield _ndjson("member", NotifyResponse(**event))
+        cursor = batch["next"]
+
+        progress = batch["progress"]
+        if progress["dispatched"] and cursor >= progress["events"]:
+            break
+        if not batch["events"]:
+            # Nothing new: a closed campaign's state will not change again
+            desc = await handle.describe()
+            if desc.status not in (None, WorkflowExecutionStatus.RUNNING):
+                yield _ndjson(
+                    "error",
+                    NotifyResponse(
+                        status=f"CAMPAIGN_{desc.status.name}",
+                        message="Campaign closed before dispatching every member",
+                    ),
+                )
+                break
+            await asyncio.sleep(settings.CAMPAIGN_STREAM_POLL_SECONDS)
+
+    desc = await handle.describe()
+    yield _ndjson(
+        "summary",
+        CampaignProgress(
+            job_id=handle.id,
+            status=desc.status.name if desc.status else "UNKNOWN",
+            **progress,
+        ),
+    )
+
+
+@app.get("/notify/{job_id}", response_model=CampaignProgress)
+async def notify_status(
+    job_id: str,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+):
+    await require_auth(authorization=f"Bearer {credentials.credentials}")
+    client: Client = app.state.temporal
+
+    # Latest run of the campaign, following continue-as-new
+    handle = client.get_workflow_handle(job_id)
+    try:
+        desc = await handle.describe()
+        progress = await handle.query(NotifyCampaignWorkflow.progress)
+    except RPCError as e:
+        if e.status == RPCStatusCode.NOT_FOUND:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Unknown job id")
+        raise
+
+    return CampaignProgress(
+        job_id=job_id,
+        status=desc.status.name if desc.status else "UNKNOWN",
+        **progress,
+    )
+
+
+def _ledger() -> DeliveryLedger:
+    if settings.LOG_BACKEND != "sqlite":
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Delivery queries need LOG_BACKEND=sqlite",
+        )
+    return get_ledger()
+
+
+@app.get("/deliveries", response_model=DeliveriesResponse)
+async def deliveries(
+    campaign_id: str | None = None,
+    workflow_id: str | None = None,
+    member_id: str | None = None,
+    email: str | None = None,
+    status_: str | None = Query(None, alias="status"),
+    limit: int = Query(100, ge=1, le=1000),
+    before_id: int | None = None,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+):
+    """Delivery log rows from the ledger, newest first, filtered on indexed columns."""
+    await require_auth(authorization=f"Bearer {credentials.credentials}")
+    rows = await asyncio.to_thread(
+        _ledger().query,
+        limit=limit,
+        before_id=before_id,
+        campaign_id=campaign_id,
+        workflow_id=workflow_id,
+        member_id=member_id.strip() if member_id else None,
+        email=email.strip().lower() if email else None,
+        status=status_,
+    )
+    return DeliveriesResponse(
+        deliveries=[DeliveryRecord(**r) for r in rows],
+        next_before_id=rows[-1]["id"] if len(rows) == limit else None,
+    )
+
+
+@app.get("/deliveries/summary", response_model=DeliverySummary)
+async def deliveries_summary(
+    campaign_id: str | None = None,
+    workflow_id: str | None = None,
+    member_id: str | None = None,
+    email: str | None = None,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+):
+    """Row counts per status, e.g. how many were sent in a campaign."""
+    await require_auth(authorization=f"Bearer {credentials.credentials}")
+    counts = await asyncio.to_thread(
+        _ledger().counts,
+        campaign_id=campaign_id,
+        workflow_id=workflow_id,
+        member_id=member_id.strip() if member_id else None,
+        email=email.strip().lower() if email else None,
+    )
+    return DeliverySummary(total=sum(counts.values()), counts=counts)
+
+
+@app.post("/webhooks/sendgrid", status_code=status.HTTP_204_NO_CONTENT)
+async def sendgrid_webhook(request: Request):
+    """
+    SendGrid event webhook. Verifies the signed batch, hands it to the
+    in-process ingestor and answers at once; events reach the delivery
+    log and suppression index in bulk shortly after.
+    """
+    if not settings.SENDGRID_WEBHOOK_PUBLIC_KEY:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="SENDGRID_WEBHOOK_PUBLIC_KEY is not set",
+        )
+
+    body = await request.body()
+    try:
+        await asyncio.to_thread(
+            verify_signature,
+            body,
+            request.headers.get(SIGNATURE_HEADER),
+            request.headers.get(TIMESTAMP_HEADER),
+        )
+    except WebhookSignatureError as e:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
+
+    try:
+        events = json.loads(body)
+    except ValueError:
+        events = None
+    if not isinstance(events, list):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Expected an event array")
+
+    if not webhook_ingestor.submit([e for e in events if isinstance(e, dict)]):
+        # SendGrid retries non-2xx deliveries
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Event buffer full"
+        )
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
 
-    return JSONResponse([resp.dict() for resp in responses])
+@app.get("/metrics")
+async def metrics():
+    body, content_type = render_latest()
+    return Response(content=body, media_type=content_type)
 
 
 @app.get("/health")
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from typing import Any, Callable
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.core import GaugeMetricFamily
+from temporalio import activity
+from temporalio.worker import (
+    ActivityInboundInterceptor,
+    ExecuteActivityInput,
+    Interceptor,
+)
+
+PREFIX = "bulk_email"
+
+ACTIVITY_SECONDS = Histogram(
+    f"{PREFIX}_activity_seconds", "Activity execution time", ["activity"]
+)
+ACTIVITY_IN_FLIGHT = Gauge(
+    f"{PREFIX}_activity_in_flight", "Activities currently executing", ["activity"]
+)
+ACTIVITY_ERRORS = Counter(
+    f"{PREFIX}_activity_errors_total", "Activity attempts that raised", ["activity", "error"]
+)
+
+UPSTREAM_SECONDS = Histogram(
+    f"{PREFIX}_upstream_request_seconds",
+    "External call latency (SendGrid, Google Sheets/Drive)",
+    ["upstream", "operation"],
+)
+UPSTREAM_IN_FLIGHT = Gauge(
+    f"{PREFIX}_upstream_in_flight", "External calls currently in flight", ["upstream"]
+)
+UPSTREAM_ERRORS = Counter(
+    f"{PREFIX}_upstream_errors_total",
+    "Failed external calls by upstream status code ('error' if no response)",
+    ["upstream", "status"],
+)
+
+API_SECONDS = Histogram(
+    f"{PREFIX}_api_request_seconds", "HTTP request handling time", ["method", "route", "status"]
+)
+API_IN_FLIGHT = Gauge(f"{PREFIX}_api_in_flight", "HTTP requests currently being handled")
+WORKFLOW_START_SECONDS = Histogram(
+    f"{PREFIX}_workflow_start_seconds", "Temporal start_workflow latency", ["workflow"]
+)
+
+AUTH_OUTCOMES = Counter(f"{PREFIX}_auth_total", "Auth checks by outcome", ["outcome"])
+
+
+@contextmanager
+def track_upstream(upstream: str, operation: str):
+    """Time one external call and count it as in flight meanwhile."""
+    UPSTREAM_IN_FLIGHT.labels(upstream).inc()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        UPSTREAM_SECONDS.labels(upstream, operation).observe(time.perf_counter() - start)
+        UPSTREAM_IN_FLIGHT.labels(upstream).dec()
+
+
+def record_upstream_error(upstream: str, status: int | str | None) -> None:
+    UPSTREAM_ERRORS.labels(upstream, str(status or "error")).inc()
+
+
+class _StatsCollector:
+    """Exposes the numeric fields of registered stats() dicts as gauges."""
+
+    def __init__(self):
+        self._sources: dict[str, Callable[[], dict]] = {}
+
+    def register(self, name: str, fn: Callable[[], dict]) -> None:
+        self._sources[name] = fn
+
+    def collect(self):
+        for name, fn in self._sources.items():
+            for key, value in fn().items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                yield GaugeMetricFamily(f"{PREFIX}_{name}_{key}", f"{name} {key}", value=value)
+
+
+_stats = _StatsCollector()
+REGISTRY.register(_stats)
+
+
+def register_stats(name: str, fn: Callable[[], dict]) -> None:
+    """Publish a component's stats() dict, sampled at scrape time."""
+    _stats.register(name, fn)
+
+
+def render_latest() -> tuple[bytes, str]:
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+class _ActivityMetrics(ActivityInboundInterceptor):
+    async def execute_activity(self, input: ExecuteActivityInput) -> Any:
+        name = activity.info().activity_type
+        ACTIVITY_IN_FLIGHT.labels(name).inc()
+        start = time.perf_counter()
+        try:
+            return await self.next.execute_activity(input)
+        except BaseException as e:
+            ACTIVITY_ERRORS.labels(name, type(e).__name__).inc()
+            raise
+        finally:
+            ACTIVITY_SECONDS.labels(name).observe(time.perf_counter() - start)
+            ACTIVITY_IN_FLIGHT.labels(name).dec()
+
+
+class MetricsInterceptor(Interceptor):
+    """Worker interceptor recording per-activity latency, in-flight and errors."""
+
+    def intercept_activity(self, next: ActivityInboundInterceptor) -> ActivityInboundInterceptor:
+        return _ActivityMetrics(next)
+
+
+def temporal_runtime(bind_address: str | None):
+    """
+    Temporal runtime exporting SDK metrics (task latencies, slots, polls) on
+    its own Prometheus endpoint, or None to use the default runtime.
+    """
+    if not bind_address:
+        return None
+    from temporalio.runtime import PrometheusConfig, Runtime, TelemetryConfig
+
+    return Runtime(telemetry=TelemetryConfig(metrics=PrometheusConfig(bind_address=bind_address)))
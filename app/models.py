@@ -1,5 +1,5 @@
-from pydantic import BaseModel, HttpUrl
-from typing import Optional
+from pydantic import BaseModel, Field, HttpUrl
+from typing import Literal, Optional
 
 
 class NotifyRequest(BaseModel):
@@ -14,8 +14,86 @@ class NotifyRequest(BaseModel):
     website_portal: HttpUrl
     cta_url: Optional[HttpUrl] = None
 
+    # send each page through SendGrid personalizations instead of
+    # starting one workflow per member
+    batch_send: bool = False
+
+    # stream one NDJSON line per member as the campaign dispatches it,
+    # then a summary line, instead of returning once the campaign is queued
+    stream: bool = False
+
+    # members already sent this exact payload are skipped; set this to
+    # send only to members whose last outcome for it was one of these
+    resend_statuses: Optional[list[Literal["failed", "not_found", "invalid_address"]]] = None
+
+    # send to every verified member, even those already sent this payload;
+    # resend_statuses is ignored
+    resend_all: bool = False
+
+    # pacing; default to CAMPAIGN_SEND_WINDOW_MINUTES / CAMPAIGN_DOMAIN_RATE_PER_MINUTE,
+    # 0 turns either off
+    send_window_minutes: Optional[int] = Field(None, ge=0)
+    domain_rate_per_minute: Optional[int] = Field(None, ge=0)
+
 
 class NotifyResponse(BaseModel):
     status: str
     run_id: str | None = None
     message: str | None = None
+    member_id: str | None = None
+    email: str | None = None
+    workflow_id: str | None = None
+
+
+class CampaignResponse(BaseModel):
+    status: str
+    campaign_id: str | None = None
+    run_id: str | None = None
+    message: str | None = None
+
+
+class CampaignProgress(BaseModel):
+    job_id: str
+    status: str
+    dispatched: bool = False
+    queued: int = 0
+    started: int = 0
+    start_failed: int = 0
+    sent: int = 0
+    not_found: int = 0
+    failed: int = 0
+    skipped: int = 0
+    invalid_address: int = 0
+    suppressed: int = 0
+    unreported: int = 0  # members that never reported back; included in failed
+    paused: bool = False  # dispatch held after a send error-rate spike
+    pauses: int = 0
+    total: int = 0  # rows in the tab; counted for paced campaigns
+    projected_completion: str | None = None  # ISO time; paced campaigns
+
+
+class DeliveryRecord(BaseModel):
+    id: int
+    ts_epoch: int
+    ts_iso: str
+    campaign_id: str = ""
+    campaign_ref: str = ""
+    workflow_id: str
+    run_id: str
+    member_id: str
+    email: str
+    status: str
+    message: str = ""
+    sendgrid_status: str = ""
+    event_id: str
+
+
+class DeliveriesResponse(BaseModel):
+    deliveries: list[DeliveryRecord]
+    # pass as before_id to get the next (older) page; None on the last page
+    next_before_id: int | None = None
+
+
+class DeliverySummary(BaseModel):
+    total: int
+    counts: dict[str, int]  # rows per status
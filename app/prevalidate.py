@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import hashlib
+from typing import Dict, List
+
+from .deliverability import get_address_validator
+from .sheets import get_sheet_client
+from .suppression import get_suppression_index
+
+NOT_FOUND_MESSAGE = "Member/email not present in sheet"
+INCOMPLETE_MESSAGE = "Missing member_id or email"
+DUPLICATE_MESSAGE = "Duplicate of an earlier row in this page"
+ALREADY_SENT_MESSAGE = "Already sent for this campaign"
+
+
+def verification_token(campaign_id: str, member_id: str, email: str) -> str:
+    """
+    Marks a member as already checked against the roster by its campaign.
+    Bound to the campaign and the (normalized) member, so NotifyMemberWorkflow
+    can recompute it deterministically and skip its own lookup.
+    """
+    key = f"{campaign_id}|{member_id}|{email}"
+    return "v1:" + hashlib.sha256(key.encode()).hexdigest()[:24]
+
+
+def prevalidate_members(
+    records: List[Dict],
+    campaign_id: str,
+    campaign_ref: str | None = None,
+    resend_statuses: List[str] | None = None,
+) -> Dict[str, List[Dict]]:
+    """
+    Check a page of {"member_id", "email"} records in one vectorized pass:
+    normalize both fields, drop incomplete rows, drop repeats within the
+    page, drop members suppressed for `campaign_ref`, join what is left
+    against the Members roster and check the addresses of roster matches
+    for syntax and a mail-accepting domain.
+
+    Suppressed members are those already sent this campaign payload or,
+    with `resend_statuses`, every member whose last outcome for it is not
+    one of those statuses.
+
+    Returns {"verified": [{"member_id", "email", "token"}],
+    "rejected": [{"member_id", "email", "status", "message"}]}, each in
+    page order. Rejected rows have status "skipped" (incomplete/duplicate),
+    "suppressed", "not_found" or "invalid_address".
+    """
+    import numpy as np
+    import pandas as pd
+
+    # object dtype keeps ids like 0012 / 12 as given instead of float-casting
+    df = pd.DataFrame(records, columns=["member_id", "email"], dtype=object)
+    df["member_id"] = df["member_id"].astype("string").fillna("").str.strip()
+    df["email"] = df["email"].astype("string").fillna("").str.strip().str.lower()
+
+    # Plain bool masks: comparisons on "string" columns give nullable
+    # booleans, which upcast to object (and break `~`) once assigned into
+    incomplete = ((df["member_id"] == "") | (df["email"] == "")).to_numpy(dtype=bool)
+    duplicate = df.duplicated(["member_id", "email"]).to_numpy(dtype=bool) & ~incomplete
+    candidate = ~(incomplete | duplicate)
+
+    suppressed = np.zeros(len(df), dtype=bool)
+    index = get_suppression_index()
+    if index is not None and campaign_ref and candidate.any():
+        keys = list(zip(df.loc[candidate, "member_id"], df.loc[candidate, "email"]))
+        last = index.outcomes(campaign_ref, keys)
+        outcome = pd.Series([last.get(k) for k in keys], index=df.index[candidate], dtype=object)
+        if resend_statuses is None:
+            suppressed[candidate] = (outcome == "sent").to_numpy(dtype=bool)
+        else:
+            suppressed[candidate] = (~outcome.isin(resend_statuses)).to_numpy(dtype=bool)
+        df["last_status"] = outcome.fillna("none")
+        index.suppressed += int(suppressed.sum())
+    candidate &= ~suppressed
+
+    in_roster = get_sheet_client().roster_contains(df["member_id"], df["email"])
+    matched = candidate & in_roster
+
+    # Per address, but domain answers come from the shared MX cache
+    validator = get_address_validator()
+    problems = pd.Series(None, index=df.index, dtype=object)
+    problems[matched] = [validator.check(e) for e in df.loc[matched, "email"]]
+    invalid = matched & problems.notna().to_numpy(dtype=bool)
+    verified = matched & ~invalid
+
+    df["status"] = "skipped"
+    df.loc[suppressed, "status"] = "suppressed"
+    df.loc[candidate & ~in_roster, "status"] = "not_found"
+    df.loc[invalid, "status"] = "invalid_address"
+    df["message"] = INCOMPLETE_MESSAGE
+    df.loc[duplicate, "message"] = DUPLICATE_MESSAGE
+    if suppressed.any():
+        df.loc[suppressed, "message"] = ALREADY_SENT_MESSAGE
+        if resend_statuses is not None:
+            resend_skip = suppressed & (df["last_status"] != "sent")
+            df.loc[resend_skip, "message"] = (
+                "Last outcome " + df.loc[resend_skip, "last_status"] + " not selected for resend"
+            )
+    df.loc[candidate & ~in_roster, "message"] = NOT_FOUND_MESSAGE
+    df.loc[invalid, "message"] = problems[invalid]
+
+    accepted = df.loc[verified, ["member_id", "email"]]
+    return {
+        "verified": [
+            {"member_id": m, "email": e, "token": verification_token(campaign_id, m, e)}
+            for m, e in zip(accepted["member_id"], accepted["email"])
+        ],
+        "rejected": df.loc[~verified, ["member_id", "email", "status", "message"]].to_dict("records"),
+    }
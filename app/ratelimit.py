@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+from .settings import settings
+from .metrics import register_stats
+
+try:
+    import fcntl  # POSIX only
+except ImportError:  # keep optional
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+def parse_retry_after(headers, default: float = 1.0) -> float:
+    """
+    Seconds to back off from a 429 response: Retry-After (seconds or HTTP
+    date), else X-RateLimit-Reset (epoch seconds, as SendGrid sends it).
+    """
+    value = headers.get("Retry-After")
+    if value:
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            try:
+                return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+            except (TypeError, ValueError):
+                pass
+
+    reset = headers.get("X-RateLimit-Reset")
+    if reset:
+        try:
+            return max(float(reset) - time.time(), 0.0)
+        except ValueError:
+            pass
+
+    return default
+
+
+class RateLimitBusy(Exception):
+    """The limiter's queue is longer than its max_wait; try again later."""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} rate limit queue is {retry_after:.1f}s deep")
+        self.retry_after = retry_after
+
+
+class RateLimiter:
+    """
+    Token bucket for one upstream, shared by every worker process on the
+    host through a small JSON state file guarded by flock (in-process only
+    where flock is unavailable).
+
+    The rate adapts AIMD-style: each success adds `increase` req/s up to
+    `max_rate`; a 429 halves it (down to `min_rate`) and blocks the bucket
+    for the Retry-After period. Tokens may go negative; that debt is what a
+    caller waits off before its request goes out. A caller that would wait
+    longer than `max_wait` gets RateLimitBusy instead, without adding to
+    the debt, so a busy host fails fast rather than queueing past its
+    callers' timeouts.
+
+    Every state change opens, locks and rewrites the state file, so the
+    async methods (acquire, asucceeded, athrottle) do that in a thread
+    rather than on the event loop.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_rate: float,
+        burst: float,
+        min_rate: float,
+        increase: float,
+        max_wait: float = float("inf"),
+        state_dir: str | None = None,
+    ):
+        self.name = name
+        self.max_rate = max_rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.increase = increase
+        self.max_wait = max_wait
+        self.path = os.path.join(
+            state_dir or settings.RATE_LIMIT_STATE_DIR or tempfile.gettempdir(),
+            f"bulk-email-ratelimit-{name}.json",
+        )
+        self._lock = threading.Lock()
+        self._local_state: dict | None = None
+
+        self.waits = 0
+        self.total_wait_seconds = 0.0
+        self.last_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.throttled = 0
+        self.refused = 0
+        self.rate = max_rate
+
+    def _initial_state(self) -> dict:
+        return {"rate": self.max_rate, "tokens": self.burst, "ts": time.time()}
+
+    def _update(self, fn) -> float:
+        """Apply fn(state, now) -> result under the shared lock and persist."""
+        with self._lock:
+            now = time.time()
+            if fcntl is None:
+                if self._local_state is None:
+                    self._local_state = self._initial_state()
+                result = fn(self._local_state, now)
+                self.rate = self._local_state["rate"]
+                return result
+
+            with open(self.path, "a+") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    f.seek(0)
+                    raw = f.read()
+                    try:
+                        state = json.loads(raw) if raw else self._initial_state()
+                    except ValueError:
+                        state = self._initial_state()
+                    result = fn(state, now)
+                    f.seek(0)
+                    f.truncate()
+                    json.dump(state, f)
+                    f.flush()
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+            self.rate = state["rate"]
+            return result
+
+    def _refill(self, state: dict, now: float) -> None:
+        # `ts` may lie in the future while a Retry-After block is active
+        elapsed = max(now - state["ts"], 0.0)
+        state["tokens"] = min(self.burst, state["tokens"] + elapsed * state["rate"])
+        state["ts"] = max(now, state["ts"])
+
+    def _reserve(self) -> float:
+        def take(state: dict, now: float) -> float:
+            self._refill(state, now)
+            state["tokens"] -= 1
+            wait = max(state["ts"] - now, 0.0) + max(-state["tokens"], 0.0) / state["rate"]
+            if wait > self.max_wait:
+                state["tokens"] += 1  # not taken
+            return wait
+
+        wait = self._update(take)
+        if wait > self.max_wait:
+            self.refused += 1
+            raise RateLimitBusy(self.name, wait)
+        self.waits += 1
+        self.total_wait_seconds += wait
+        self.last_wait_seconds = wait
+        self.max_wait_seconds = max(self.max_wait_seconds, wait)
+        return wait
+
+    async def acquire(self) -> None:
+        """
+        Wait (without blocking the event loop) until a request may go out;
+        raises RateLimitBusy if that would take longer than max_wait.
+        """
+        wait = await asyncio.to_thread(self._reserve)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def acquire_sync(self) -> None:
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    def succeeded(self) -> None:
+        """Additive increase after a successful call."""
+        if self.rate >= self.max_rate:
+            return
+
+        def grow(state: dict, now: float) -> None:
+            self._refill(state, now)
+            state["rate"] = min(self.max_rate, state["rate"] + self.increase)
+
+        self._update(grow)
+
+    async def asucceeded(self) -> None:
+        """succeeded() for async callers."""
+        if self.rate < self.max_rate:
+            await asyncio.to_thread(self.succeeded)
+
+    def throttle(self, retry_after: float) -> None:
+        """Multiplicative decrease and a shared block after a 429."""
+        self.throttled += 1
+
+        def shrink(state: dict, now: float) -> None:
+            self._refill(state, now)
+            state["rate"] = max(self.min_rate, state["rate"] / 2)
+            state["tokens"] = min(state["tokens"], 0.0)
+            state["ts"] = max(state["ts"], now + retry_after)
+
+        self._update(shrink)
+        logger.warning(
+            "%s returned 429; rate now %.2f/s, blocked for %.1fs",
+            self.name, self.rate, retry_after,
+        )
+
+    async def athrottle(self, retry_after: float) -> None:
+        """throttle() for async callers."""
+        await asyncio.to_thread(self.throttle, retry_after)
+
+    def stats(self) -> dict:
+        return {
+            "rate": self.rate,
+            "waits": self.waits,
+            "total_wait_seconds": self.total_wait_seconds,
+            "last_wait_seconds": self.last_wait_seconds,
+            "max_wait_seconds": self.max_wait_seconds,
+            "throttled": self.throttled,
+            "refused": self.refused,
+        }
+
+
+sendgrid_limiter = RateLimiter(
+    "sendgrid",
+    max_rate=settings.SENDGRID_RATE_PER_SECOND,
+    burst=settings.SENDGRID_RATE_BURST,
+    min_rate=settings.RATE_LIMIT_MIN_PER_SECOND,
+    increase=settings.SENDGRID_RATE_PER_SECOND / 100,
+    max_wait=settings.SENDGRID_RATE_MAX_WAIT_SECONDS,
+)
+
+sheets_limiter = RateLimiter(
+    "sheets",
+    max_rate=settings.SHEETS_RATE_PER_SECOND,
+    burst=settings.SHEETS_RATE_BURST,
+    min_rate=settings.RATE_LIMIT_MIN_PER_SECOND,
+    increase=settings.SHEETS_RATE_PER_SECOND / 20,
+    max_wait=settings.SHEETS_RATE_MAX_WAIT_SECONDS,
+)
+
+register_stats("ratelimit_sendgrid", sendgrid_limiter.stats)
+register_stats("ratelimit_sheets", sheets_limiter.stats)
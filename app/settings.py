@@ -11,27 +11,105 @@ class Settings(BaseSettings):
     TEMPORAL_ADDRESS: str
     TASK_QUEUE: str = "member-email-task-queue"
 
+    # Campaign fan-out
+    CAMPAIGN_PAGE_SIZE: int = 500
+    CAMPAIGN_MAX_CONCURRENT_STARTS: int = 50
+    CAMPAIGN_LEAN_MEMBERS: bool = True  # local activities + fused send/log per member
+    CAMPAIGN_STREAM_POLL_SECONDS: float = 0.5  # /notify stream: idle wait between event queries
+    CAMPAIGN_SEND_WINDOW_MINUTES: int = 0  # spread each campaign over this long; 0 = as fast as allowed
+    CAMPAIGN_DOMAIN_RATE_PER_MINUTE: int = 0  # max sends per recipient domain per minute; 0 = no cap
+
     # Google Sheets (primary)
     GOOGLE_SA_JSON_PATH: str | None = None
     GOOGLE_SHEET_ID: str | None = None
     GOOGLE_SHEET_TAB: str = "Members"
     GOOGLE_LOG_SHEET_TAB: str = "Log"
+    GOOGLE_CAMPAIGNS_SHEET_TAB: str = "Campaigns"
+    SHEETS_TOKEN_REFRESH_MARGIN_SECONDS: int = 300
+    SHEETS_PAGE_SIZE: int = 5000  # rows per A1 range read when streaming a tab
+
+    # Roster cache (per worker process)
+    ROSTER_CACHE_TTL_SECONDS: int = 300
+    ROSTER_REVISION_CHECK_SECONDS: int = 30  # CSV roster / snapshot file; Sheets uses the TTL
+    ROSTER_SNAPSHOT_PATH: str | None = None  # compiled by `python -m app.snapshot`; mmapped by workers
 
     # CSV fallback
     CSV_PATH: str = "./members.csv"
     LOG_CSV_PATH: str = "./delivery_log.csv"
+    CAMPAIGN_CSV_PATH: str = "./campaigns.csv"
+    CAMPAIGN_CACHE_SIZE: int = 256  # resolved campaign payloads kept per process
+
+    # Delivery log
+    LOG_BACKEND: str = "auto"  # "auto" (sheets if configured, else csv) | "sheets" | "csv" | "sqlite"
+    LOG_SQLITE_PATH: str = "./delivery_log.db"  # shared by workers and API for GET /deliveries
+
+    # Last outcome per (campaign payload, member), for cheap re-runs; empty disables.
+    # One local file per host, shared by the API and its workers; backfilled
+    # from the ledger when LOG_BACKEND=sqlite (`python -m app.suppression`)
+    SUPPRESSION_PATH: str | None = "./suppression.db"
+
+    # Delivery log buffering (worker)
+    LOG_FLUSH_MAX_ROWS: int = 200
+    LOG_FLUSH_INTERVAL_SECONDS: float = 2.0
 
     # SendGrid
     SENDGRID_API_KEY: str | None = None
     SENDGRID_TEMPLATE_ID: str | None = None
     SENDGRID_FROM_EMAIL: str | None = None
     SENDGRID_FROM_NAME: str = "Notifications"
+    SENDGRID_MAX_PERSONALIZATIONS: int = 1000  # SendGrid v3 per-request limit
+    SENDGRID_API_BASE_URL: str = "https://api.sendgrid.com"
+    SENDGRID_POOL_SIZE: int = 100  # keep-alive connections per process
+    SENDGRID_KEEPALIVE_SECONDS: float = 60.0
+    SENDGRID_BREAKER_FAILURES: int = 5  # consecutive 5xx/429/network errors to open
+    SENDGRID_BREAKER_RESET_SECONDS: float = 30.0
+    SENDGRID_TIMEOUT_SECONDS: float = 20.0
+
+    # SendGrid event webhook (API): signed batches of delivery events
+    SENDGRID_WEBHOOK_PUBLIC_KEY: str | None = None  # base64 key from Mail Settings; required
+    SENDGRID_WEBHOOK_MAX_AGE_SECONDS: int = 600  # reject older signed timestamps (replays)
+    SENDGRID_WEBHOOK_FLUSH_ROWS: int = 5000
+    SENDGRID_WEBHOOK_FLUSH_SECONDS: float = 1.0
+    SENDGRID_WEBHOOK_MAX_PENDING: int = 200_000  # buffered events before answering 503
+
+    # Outbound rate limits (token buckets shared by workers on a host)
+    SENDGRID_RATE_PER_SECOND: float = 100.0
+    SENDGRID_RATE_BURST: float = 100.0
+    SHEETS_RATE_PER_SECOND: float = 1.0  # Sheets API: 60 requests/min/user
+    SHEETS_RATE_BURST: float = 5.0
+    RATE_LIMIT_MIN_PER_SECOND: float = 0.1
+    # Longest a call queues for its token before failing as retryable; kept
+    # under the send (30s) and log (10s) activity timeouts
+    SENDGRID_RATE_MAX_WAIT_SECONDS: float = 20.0
+    SHEETS_RATE_MAX_WAIT_SECONDS: float = 5.0
+    RATE_LIMIT_STATE_DIR: str | None = None  # default: system temp dir
+
+    # Recipient address pre-check
+    EMAIL_CHECK_DELIVERABILITY: bool = True  # MX/A lookup per domain; syntax is always checked
+    EMAIL_MX_CACHE_SIZE: int = 10_000
+    EMAIL_MX_CACHE_TTL_SECONDS: float = 3600.0
+    EMAIL_DNS_TIMEOUT_SECONDS: float = 3.0
 
     # Auth
     AUTH_STATIC_BEARER_TOKEN: str | None = None
     AUTH_JWT_SECRET: str | None = None
     AUTH_JWT_ISSUER: str | None = None
     AUTH_JWT_AUDIENCE: str | None = None
+    AUTH_CACHE_SIZE: int = 1024  # verified JWTs kept in memory
+    AUTH_CACHE_TTL_SECONDS: float = 300.0
+
+    # Worker processes and concurrency
+    WORKER_PROCESSES: int = 0  # 0 = one per CPU
+    WORKER_MAX_CONCURRENT_ACTIVITIES: int = 200
+    WORKER_MAX_CONCURRENT_WORKFLOW_TASKS: int = 100
+    WORKER_ACTIVITY_THREADS: int = 16  # for sync gspread/pandas activities
+    WORKER_GRACEFUL_SHUTDOWN_SECONDS: int = 30
+    WORKER_WARMUP: bool = True  # build roster index / SendGrid pool before polling
+
+    # Metrics
+    WORKER_METRICS_PORT: int = 9100  # app metrics exporter; 0 disables
+    WORKER_TEMPORAL_METRICS_ADDRESS: str | None = None  # e.g. "0.0.0.0:9101"
+    API_TEMPORAL_METRICS_ADDRESS: str | None = None
 
     # CORS
     ALLOWED_ORIGINS: str  # must always be set in env
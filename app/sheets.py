@@ -1,39 +1,321 @@
 from __future__ import annotations
 
+import csv
+import hashlib
 import os
+import threading
 import time
-import pandas as pd
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from itertools import islice, zip_longest
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, Iterator
 from .settings import settings
+from .ratelimit import parse_retry_after, sheets_limiter
+from .metrics import record_upstream_error, register_stats, track_upstream
 
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
 
-from dotenv import load_dotenv
-load_dotenv()
+    from .snapshot import RosterSnapshot
 
+SCOPES = [
+    "https://www.googleapis.com/auth/spreadsheets",
+]
 
-# Optional Google Sheets libs (only if you configure Google service account)
-try:
-    import gspread
-    from google.oauth2.service_account import Credentials
-except Exception:  # keep optional
-    gspread = None
-    Credentials = None
 
-SCOPES = ["https://www.googleapis.com/auth/spreadsheets"]
+LOG_COLUMNS = [
+    "ts_epoch",
+    "ts_iso",
+    "workflow_id",
+    "run_id",
+    "member_id",
+    "email",
+    "status",
+    "message",
+    "sendgrid_status",
+]
+
+# Fields a log row's event id is derived from. The Log tab and CSV keep
+# their original columns, so deduplication there recomputes ids from these.
+LOG_EVENT_KEY = ("workflow_id", "run_id", "member_id", "email", "status")
+
+
+def log_event_id(row: dict) -> str:
+    """
+    Deterministic id for a delivery log row, so a retried write of the same
+    event can be recognised and skipped.
+    """
+    key = "|".join(str(row.get(k, "")) for k in LOG_EVENT_KEY)
+    return hashlib.sha1(key.encode()).hexdigest()[:16]
+
+
+def normalize_member_id(value) -> str:
+    return str(value).strip()
+
+
+def normalize_email(value) -> str:
+    return str(value).strip().lower()
+
+
+@lru_cache(maxsize=None)
+def google_libs() -> SimpleNamespace | None:
+    """
+    Optional Google Sheets libs (only if you configure Google service account),
+    imported on first use: gspread and google-auth are a large share of
+    import time and the API process never needs them.
+    """
+    try:
+        import gspread
+        from gspread.http_client import HTTPClient
+        from google.auth.transport.requests import Request
+        from google.oauth2.service_account import Credentials
+    except Exception:  # keep optional
+        return None
+
+    class RateLimitedHTTPClient(HTTPClient):
+        """gspread HTTP client that paces every Sheets/Drive call through sheets_limiter."""
+
+        def request(self, method: str, endpoint: str, *args, **kwargs):
+            sheets_limiter.acquire_sync()
+            try:
+                with track_upstream("sheets", method.lower()):
+                    response = super().request(method, endpoint, *args, **kwargs)
+            except gspread.exceptions.APIError as e:
+                record_upstream_error("sheets", e.response.status_code)
+                if e.response.status_code == 429:
+                    sheets_limiter.throttle(parse_retry_after(e.response.headers))
+                raise
+            except Exception:
+                record_upstream_error("sheets", None)
+                raise
+            sheets_limiter.succeeded()
+            return response
+
+    return SimpleNamespace(
+        gspread=gspread,
+        Request=Request,
+        Credentials=Credentials,
+        RateLimitedHTTPClient=RateLimitedHTTPClient,
+    )
+
+
+def numericise(value):
+    """Same coercion get_all_records applies: int, then float, else unchanged."""
+    if not isinstance(value, str) or value == "" or "_" in value:
+        return value
+    for cast in (int, float):
+        try:
+            return cast(value)
+        except ValueError:
+            pass
+    return value
+
+
+def column_letter(n: int) -> str:
+    """1-based column number to its A1 letters (1 -> A, 27 -> AA)."""
+    letters = ""
+    while n:
+        n, rem = divmod(n - 1, 26)
+        letters = chr(ord("A") + rem) + letters
+    return letters
+
+
+def iter_worksheet_pages(ws, page_size: int, offset: int = 0) -> Iterator[list[dict]]:
+    """
+    Yield the worksheet's records (header row as keys, like get_all_records)
+    in pages of `page_size`, fetching one A1 row range per page.
+    `offset` skips that many data rows (header excluded).
+
+    The Sheets API leaves trailing blank rows out of a range, so a short
+    page does not mean the tab has ended; paging stops at the first range
+    with no rows at all (a run of `page_size` blank rows, or the end).
+    """
+    header = ws.row_values(1)
+    if not header:
+        return
+    last_col = column_letter(len(header))
+
+    start = 2 + offset
+    while True:
+        end = start + page_size - 1
+        values = ws.get(f"A{start}:{last_col}{end}")
+        if not values:
+            return
+        yield [
+            dict(zip(header, [numericise(v) for v in row] + [""] * (len(header) - len(row))))
+            for row in values
+        ]
+        start = end + 1
+
+
+def iter_csv_pages(path: str, page_size: int, offset: int = 0) -> Iterator[list[dict]]:
+    """CSV counterpart of iter_worksheet_pages."""
+    with open(path, newline="") as f:
+        rows = islice(csv.DictReader(f), offset, None)
+        while True:
+            page = [
+                {k: numericise(v) for k, v in row.items()}
+                for row in islice(rows, page_size)
+            ]
+            if not page:
+                return
+            yield page
+
+
+class SheetsAccess:
+    """
+    Process-wide, long-lived gspread client for one service account.
+
+    Spreadsheet and worksheet handles are cached by sheet id / tab name, and
+    the OAuth token is refreshed ahead of expiry instead of on a failed call.
+    Shared by the API and the worker; use `sheets_access()` to get one.
+    """
+
+    def __init__(self, service_account_path: str | None):
+        self._path = service_account_path
+        self._lock = threading.Lock()
+        self._creds = None
+        self._client = None
+        self._spreadsheets: dict[str, object] = {}
+        self._worksheets: dict[tuple[str, str], object] = {}
+
+    @property
+    def available(self) -> bool:
+        if self._client is not None and self._creds is None:
+            return True  # pre-built client installed via use_client()
+        return bool(
+            self._path
+            and os.path.exists(self._path)
+            and google_libs()
+        )
+
+    def client(self):
+        """Return the authorized gspread client, refreshing its token if due."""
+        if not self.available:
+            raise RuntimeError("Google Sheets is not configured (GOOGLE_SA_JSON_PATH)")
+
+        with self._lock:
+            if self._client is None:
+                g = google_libs()
+                self._creds = g.Credentials.from_service_account_file(self._path, scopes=SCOPES)
+                self._client = g.gspread.authorize(
+                    self._creds, http_client=g.RateLimitedHTTPClient
+                )
+            if self._creds is not None:
+                self._refresh_if_expiring()
+            return self._client
+
+    def use_client(self, client) -> None:
+        """
+        Install a pre-built gspread-compatible client (e.g. an in-memory
+        stand-in for benchmarks) in place of the service account one.
+        """
+        with self._lock:
+            self._creds = None
+            self._client = client
+            self._spreadsheets.clear()
+            self._worksheets.clear()
+
+    def _refresh_if_expiring(self) -> None:
+        creds = self._creds
+        margin = timedelta(seconds=settings.SHEETS_TOKEN_REFRESH_MARGIN_SECONDS)
+        # google-auth keeps expiry as a naive UTC datetime
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        if not creds.token or (creds.expiry and creds.expiry - now <= margin):
+            creds.refresh(google_libs().Request())
+
+    def spreadsheet(self, sheet_id: str | None = None):
+        sheet_id = sheet_id or settings.GOOGLE_SHEET_ID
+        client = self.client()
+        with self._lock:
+            sh = self._spreadsheets.get(sheet_id)
+        if sh is None:
+            sh = client.open_by_key(sheet_id)
+            with self._lock:
+                self._spreadsheets[sheet_id] = sh
+        return sh
+
+    def worksheet(
+        self,
+        tab: str,
+        sheet_id: str | None = None,
+        create_cols: list[str] | None = None,
+    ):
+        """
+        Return the handle for `tab`. If the tab is missing and `create_cols`
+        is given, create it with that header row.
+        """
+        sheet_id = sheet_id or settings.GOOGLE_SHEET_ID
+        key = (sheet_id, tab)
+        with self._lock:
+            ws = self._worksheets.get(key)
+        if ws is not None:
+            return ws
+
+        sh = self.spreadsheet(sheet_id)
+        try:
+            ws = sh.worksheet(tab)
+        except google_libs().gspread.WorksheetNotFound:
+            if create_cols is None:
+                raise
+            # Create tab and write header row once
+            ws = sh.add_worksheet(title=tab, rows=1000, cols=len(create_cols))
+            ws.append_row(create_cols)
+
+        with self._lock:
+            self._worksheets[key] = ws
+        return ws
+
+    def invalidate(self, tab: str | None = None, sheet_id: str | None = None) -> None:
+        """Drop cached handles (all, or one tab) so they are re-opened."""
+        sheet_id = sheet_id or settings.GOOGLE_SHEET_ID
+        with self._lock:
+            if tab is None:
+                self._spreadsheets.clear()
+                self._worksheets.clear()
+            else:
+                self._worksheets.pop((sheet_id, tab), None)
+
+
+_access_by_path: dict[str | None, SheetsAccess] = {}
+_access_lock = threading.Lock()
+
+
+def sheets_access(service_account_path: str | None = None) -> SheetsAccess:
+    """Shared SheetsAccess for a service account (default: GOOGLE_SA_JSON_PATH)."""
+    path = service_account_path or settings.GOOGLE_SA_JSON_PATH
+    with _access_lock:
+        access = _access_by_path.get(path)
+        if access is None:
+            access = _access_by_path[path] = SheetsAccess(path)
+        return access
 
 
 class SheetClient:
     def __init__(self):
-        self._client = None
-        if (
-            settings.GOOGLE_SA_JSON_PATH
-            and os.path.exists(settings.GOOGLE_SA_JSON_PATH)
-            and gspread
-            and Credentials
-        ):
-            creds = Credentials.from_service_account_file(
-                settings.GOOGLE_SA_JSON_PATH, scopes=SCOPES
-            )
-            self._client = gspread.authorize(creds)
+        self._sheets = sheets_access()
+
+        # Per-worker roster index keyed by normalized (member_id, email)
+        self._roster_lock = threading.Lock()
+        self._roster_index: dict[tuple[str, str], dict] | None = None
+        self._roster_keys: pd.MultiIndex | None = None  # built on demand
+        self._roster_revision: str | None = None
+        self._roster_loaded_at = 0.0
+        self._roster_checked_at = 0.0
+        self.roster_hits = 0
+        self.roster_misses = 0
+        self.roster_refreshes = 0
+
+        # Compiled roster shared by every process on the host, if configured
+        self._snapshot: RosterSnapshot | None = None
+        self._snapshot_checked_at = 0.0
+        self.snapshot_reloads = 0
+
+    def _use_sheets(self) -> bool:
+        return self._sheets.available and bool(settings.GOOGLE_SHEET_ID)
 
     def members_df(self) -> pd.DataFrame:
         """
@@ -42,10 +324,15 @@ class SheetClient:
 
         Prefers Google Sheets; falls back to CSV if not available.
         """
-        if self._client and settings.GOOGLE_SHEET_ID:
-            sh = self._client.open_by_key(settings.GOOGLE_SHEET_ID)
-            ws = sh.worksheet(settings.GOOGLE_SHEET_TAB)
-            data = ws.get_all_records()
+        import pandas as pd  # only this path needs it
+
+        if self._use_sheets():
+            ws = self._sheets.worksheet(settings.GOOGLE_SHEET_TAB)
+            try:
+                data = ws.get_all_records()
+            except Exception:
+                self._sheets.invalidate(settings.GOOGLE_SHEET_TAB)
+                raise
             return pd.DataFrame(data)
 
         # Fallback: CSV
@@ -55,57 +342,302 @@ class SheetClient:
         # Empty default
         return pd.DataFrame(columns=["member_id", "email"])
 
+    def iter_roster_pages(self, page_size: int | None = None) -> Iterator[list[dict]]:
+        """
+        Stream the Members roster in pages instead of loading it whole.
+        Prefers Google Sheets; falls back to CSV if not available.
+        """
+        page_size = page_size or settings.SHEETS_PAGE_SIZE
+        if self._use_sheets():
+            ws = self._sheets.worksheet(settings.GOOGLE_SHEET_TAB)
+            try:
+                yield from iter_worksheet_pages(ws, page_size)
+            except Exception:
+                self._sheets.invalidate(settings.GOOGLE_SHEET_TAB)
+                raise
+            return
+
+        if os.path.exists(settings.CSV_PATH):
+            yield from iter_csv_pages(settings.CSV_PATH, page_size)
+
+    def roster_revision(self) -> str | None:
+        """
+        Cheap change marker for the Members roster: the CSV's mtime/size.
+        None if it cannot be determined, which leaves refreshes to
+        ROSTER_CACHE_TTL_SECONDS.
+
+        Always None for Sheets: the only cheap marker there, Drive's
+        modifiedTime, covers the whole spreadsheet and so changes with
+        every Log and Campaigns tab write.
+        """
+        if self._use_sheets():
+            return None
+
+        if os.path.exists(settings.CSV_PATH):
+            st = os.stat(settings.CSV_PATH)
+            return f"{st.st_mtime_ns}:{st.st_size}"
+
+        return None
+
+    def _roster_is_stale(self, now: float) -> bool:
+        if self._roster_index is None:
+            return True
+        if now - self._roster_loaded_at >= settings.ROSTER_CACHE_TTL_SECONDS:
+            return True
+        if now - self._roster_checked_at >= settings.ROSTER_REVISION_CHECK_SECONDS:
+            self._roster_checked_at = now
+            revision = self.roster_revision()
+            return revision is not None and revision != self._roster_revision
+        return False
+
+    def _refresh_roster(self, now: float) -> None:
+        revision = self.roster_revision()
+
+        index: dict[tuple[str, str], dict] = {}
+        for record in (r for page in self.iter_roster_pages() for r in page):
+            member_id = normalize_member_id(record.get("member_id", ""))
+            email = normalize_email(record.get("email", ""))
+            record["member_id"] = member_id
+            record["email"] = email
+            # First row wins, matching the previous boolean-mask lookup
+            index.setdefault((member_id, email), record)
+
+        self._roster_index = index
+        self._roster_keys = None
+        self._roster_revision = revision
+        self._roster_loaded_at = now
+        self._roster_checked_at = now
+        self.roster_refreshes += 1
+
+    def roster_snapshot(self) -> RosterSnapshot | None:
+        """
+        The memory-mapped roster at ROSTER_SNAPSHOT_PATH, or None if unset
+        or not compiled yet. The file is re-stat'ed every
+        ROSTER_REVISION_CHECK_SECONDS and reopened once it has been replaced.
+        """
+        path = settings.ROSTER_SNAPSHOT_PATH
+        if not path:
+            return None
+
+        with self._roster_lock:
+            now = time.monotonic()
+            if (
+                self._snapshot is not None
+                and now - self._snapshot_checked_at < settings.ROSTER_REVISION_CHECK_SECONDS
+            ):
+                return self._snapshot
+            self._snapshot_checked_at = now
+
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                self._snapshot = None
+                return None
+            if self._snapshot is None or self._snapshot.identity != (
+                st.st_ino, st.st_mtime_ns, st.st_size
+            ):
+                from .snapshot import RosterSnapshot
+
+                # Lookups already holding the old mapping keep using it
+                self._snapshot = RosterSnapshot(path)
+                self.snapshot_reloads += 1
+            return self._snapshot
+
+    def lookup_member(self, member_id: str, email: str) -> dict | None:
+        """
+        Return the roster row for (member_id, email), or None if absent.
+
+        Served from the roster snapshot if one is configured, otherwise
+        from an in-memory index that is rebuilt only when
+        ROSTER_CACHE_TTL_SECONDS expires or the roster revision changes.
+        """
+        key = (normalize_member_id(member_id), normalize_email(email))
+
+        snapshot = self.roster_snapshot()
+        if snapshot is not None:
+            self.roster_hits += 1
+            return snapshot.lookup(*key)
+
+        with self._roster_lock:
+            self._ensure_roster()
+            index = self._roster_index
+
+        return index.get(key)
+
+    def roster_keys(self) -> pd.MultiIndex:
+        """
+        The roster's normalized (member_id, email) pairs as a MultiIndex, for
+        vectorized membership checks over a whole page of members. Same
+        freshness rules as lookup_member.
+        """
+        import pandas as pd
+
+        with self._roster_lock:
+            self._ensure_roster()
+            if self._roster_keys is None:
+                self._roster_keys = pd.MultiIndex.from_tuples(
+                    list(self._roster_index), names=["member_id", "email"]
+                )
+            return self._roster_keys
+
+    def roster_contains(self, member_ids, emails) -> np.ndarray:
+        """
+        Vectorized membership check for normalized (member_id, email) pairs;
+        one bool per pair. Uses the roster snapshot when configured.
+        """
+        snapshot = self.roster_snapshot()
+        if snapshot is not None:
+            self.roster_hits += 1
+            return snapshot.contains(member_ids, emails)
+
+        import pandas as pd
+
+        return pd.MultiIndex.from_arrays([member_ids, emails]).isin(self.roster_keys())
+
+    def _ensure_roster(self) -> None:
+        # Caller holds _roster_lock
+        now = time.monotonic()
+        if self._roster_is_stale(now):
+            self.roster_misses += 1
+            self._refresh_roster(now)
+        else:
+            self.roster_hits += 1
+
+    def warm_up(self) -> None:
+        """Open the roster snapshot, or build the roster index, now rather than on the first lookup."""
+        if self.roster_snapshot() is not None:
+            return
+        with self._roster_lock:
+            now = time.monotonic()
+            if self._roster_is_stale(now):
+                self._refresh_roster(now)
+
+    def roster_stats(self) -> dict:
+        return {
+            "hits": self.roster_hits,
+            "misses": self.roster_misses,
+            "refreshes": self.roster_refreshes,
+            "size": self._snapshot.rows if self._snapshot else len(self._roster_index or {}),
+            "revision": self._snapshot.revision if self._snapshot else self._roster_revision,
+            "snapshot_reloads": self.snapshot_reloads,
+        }
+
     def append_log(self, row: dict) -> None:
         """
-        Append a single delivery log row to the 'Log' tab (or CSV fallback).
+        Append a single delivery log row to the configured log backend.
+        """
+        self.append_log_rows([row])
+
+    def log_backend(self) -> str:
+        """The delivery log backend in use: "sheets", "csv" or "sqlite"."""
+        if settings.LOG_BACKEND == "auto":
+            return "sheets" if self._use_sheets() else "csv"
+        return settings.LOG_BACKEND
+
+    def append_log_rows(self, rows: list[dict], dedupe: bool = False) -> None:
+        """
+        Append delivery log rows to the configured backend (LOG_BACKEND): the
+        'Log' tab, the CSV fallback or the SQLite ledger, in one write.
         Ensures consistent columns and includes both epoch and ISO timestamps.
+
+        With `dedupe`, rows whose event is already present in the log are
+        skipped; used when retrying a flush whose outcome is unknown. The
+        ledger always skips them, its event_id column being unique; the Log
+        tab and CSV have no event_id column, so they compare log_event_id()
+        of the existing rows.
         """
-        cols = [
-            "ts_epoch",
-            "ts_iso",
-            "workflow_id",
-            "run_id",
-            "member_id",
-            "email",
-            "status",
-            "message",
-            "sendgrid_status",
-        ]
+        if not rows:
+            return
+
+        cols = LOG_COLUMNS
         now = int(time.time())
-        iso = pd.Timestamp.utcnow().isoformat()
-
-        base = {
-            "ts_epoch": now,
-            "ts_iso": iso,
-            "workflow_id": row.get("workflow_id", ""),
-            "run_id": row.get("run_id", ""),
-            "member_id": row.get("member_id", ""),
-            "email": row.get("email", ""),
-            "status": row.get("status", ""),
-            "message": row.get("message", ""),
-            "sendgrid_status": row.get("sendgrid_status", ""),
-        }
+        iso = datetime.now(timezone.utc).isoformat()
+
+        bases = [
+            {
+                "ts_epoch": now,
+                "ts_iso": iso,
+                "campaign_id": row.get("campaign_id") or "",
+                "campaign_ref": row.get("campaign_ref") or "",
+                "workflow_id": row.get("workflow_id", ""),
+                "run_id": row.get("run_id", ""),
+                "member_id": row.get("member_id", ""),
+                "email": row.get("email", ""),
+                "status": row.get("status", ""),
+                "message": row.get("message", ""),
+                "sendgrid_status": row.get("sendgrid_status", ""),
+                "event_id": row.get("event_id") or log_event_id(row),
+            }
+            for row in rows
+        ]
+
+        backend = self.log_backend()
+        if backend == "sqlite":
+            from .ledger import get_ledger
+
+            get_ledger().append(bases)
+            return
+
+        values = [[base[c] for c in cols] for base in bases]
+
+        def unlogged(existing_rows: Iterator[dict]) -> list[list]:
+            # Rejected sheet rows may repeat a key; skip only as many
+            # copies of each as the log already holds
+            existing = Counter(log_event_id(r) for r in existing_rows)
+            kept = []
+            for v, base in zip(values, bases):
+                key = log_event_id(base)
+                if existing[key]:
+                    existing[key] -= 1
+                else:
+                    kept.append(v)
+            return kept
 
-        if self._client and settings.GOOGLE_SHEET_ID:
-            sh = self._client.open_by_key(settings.GOOGLE_SHEET_ID)
+        if backend == "sheets":
+            ws = self._sheets.worksheet(settings.GOOGLE_LOG_SHEET_TAB, create_cols=cols)
             try:
-                ws = sh.worksheet(settings.GOOGLE_LOG_SHEET_TAB)
+                if dedupe:
+                    # Only the columns the ids are derived from
+                    key_cols = [ws.col_values(cols.index(c) + 1) for c in LOG_EVENT_KEY]
+                    values = unlogged(
+                        dict(zip(LOG_EVENT_KEY, r)) for r in zip_longest(*key_cols, fillvalue="")
+                    )
+                if values:
+                    ws.append_rows(values)
             except Exception:
-                # Create tab and write header row once
-                ws = sh.add_worksheet(
-                    title=settings.GOOGLE_LOG_SHEET_TAB,
-                    rows=1000,
-                    cols=len(cols),
-                )
-                ws.append_row(cols)
-            ws.append_row([base[c] for c in cols])
+                self._sheets.invalidate(settings.GOOGLE_LOG_SHEET_TAB)
+                raise
             return
 
         # CSV fallback with headers
         header = not os.path.exists(settings.LOG_CSV_PATH)
-        pd.DataFrame([[base[c] for c in cols]], columns=cols).to_csv(
-            settings.LOG_CSV_PATH, mode="a", header=header, index=False
-        )
+        if dedupe and not header:
+            with open(settings.LOG_CSV_PATH, newline="") as f:
+                values = unlogged(csv.DictReader(f))
+        with open(settings.LOG_CSV_PATH, "a", newline="") as f:
+            writer = csv.writer(f)
+            if header:
+                writer.writerow(cols)
+            writer.writerows(values)
+
+
+_sheet_client: SheetClient | None = None
+_sheet_client_lock = threading.Lock()
+
+
+def get_sheet_client() -> SheetClient:
+    """The process-wide SheetClient, created on first use."""
+    global _sheet_client
+    if _sheet_client is None:
+        with _sheet_client_lock:
+            if _sheet_client is None:
+                _sheet_client = SheetClient()
+    return _sheet_client
+
+
+def _roster_stats() -> dict:
+    # Don't build the client just to report that it is empty
+    return _sheet_client.roster_stats() if _sheet_client is not None else {}
 
 
-sheet_client = SheetClient()
+register_stats("roster", _roster_stats)
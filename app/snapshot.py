@@ -0,0 +1,194 @@
+"""
+Compiled, memory-mapped Members roster.
+
+`python -m app.snapshot` reads the roster (Sheets or CSV, as SheetClient
+does) and writes one file: sorted 64-bit hashes of the normalized
+(member_id, email) keys plus each column as an offsets array over a UTF-8
+blob. Workers map it read-only, so every process on a host shares the
+same page-cache copy, and answer lookups with a binary search instead of
+building their own index.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import struct
+import tempfile
+from typing import Iterable
+
+import numpy as np
+
+MAGIC = b"ROSTER1\0"
+_ALIGN = 8
+
+
+def key_hash(member_id: str, email: str) -> int:
+    """64-bit hash of a normalized roster key."""
+    digest = hashlib.blake2b(f"{member_id}\0{email}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def _pad(n: int) -> int:
+    return -n % _ALIGN
+
+
+def write_snapshot(records: Iterable[dict], path: str, revision: str | None = None) -> int:
+    """
+    Compile normalized roster records into a snapshot at `path` and return
+    the row count. The file is written next to `path` and moved into place
+    with os.replace, so readers see either the old snapshot or the new one.
+    First row wins for repeated keys, as in SheetClient's own index.
+    """
+    columns = ["member_id", "email"]
+    rows: list[dict] = []
+    seen: set[tuple[str, str]] = set()
+    for record in records:
+        key = (record["member_id"], record["email"])
+        if key in seen:
+            continue
+        seen.add(key)
+        rows.append(record)
+        for column in record:
+            if column not in columns:
+                columns.append(column)
+
+    hashes = np.fromiter(
+        (key_hash(r["member_id"], r["email"]) for r in rows), dtype=np.uint64, count=len(rows)
+    )
+    order = np.argsort(hashes, kind="stable")
+    arrays = {"hashes": hashes[order], "order": order.astype(np.int64)}
+    for column in columns:
+        encoded = [
+            ("" if r.get(column) is None else str(r.get(column))).encode() for r in rows
+        ]
+        offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum([len(v) for v in encoded], out=offsets[1:])
+        arrays[f"offsets:{column}"] = offsets
+        arrays[f"data:{column}"] = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+    layout, position = {}, 0
+    for name, array in arrays.items():
+        layout[name] = {"dtype": array.dtype.str, "count": len(array), "offset": position}
+        position += array.nbytes + _pad(array.nbytes)
+    header = json.dumps(
+        {"rows": len(rows), "columns": columns, "revision": revision, "arrays": layout}
+    ).encode()
+    header += b" " * _pad(len(header))
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".roster-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(MAGIC + struct.pack("<Q", len(header)) + header)
+            for array in arrays.values():
+                f.write(array.tobytes())
+                f.write(b"\0" * _pad(array.nbytes))
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)  # mkstemp creates it owner-only
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return len(rows)
+
+
+class RosterSnapshot:
+    """
+    Read-only view of a compiled roster file. Nothing is copied on open;
+    pages are read (and shared between processes) as lookups touch them.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            st = os.fstat(f.fileno())
+            self._mm = np.memmap(f, dtype=np.uint8, mode="r")
+        # Replacing the file swaps the inode; this mapping stays valid
+        self.identity = (st.st_ino, st.st_mtime_ns, st.st_size)
+
+        if self._mm[:len(MAGIC)].tobytes() != MAGIC:
+            raise ValueError(f"{path} is not a roster snapshot")
+        (header_len,) = struct.unpack("<Q", self._mm[8:16].tobytes())
+        header = json.loads(self._mm[16:16 + header_len].tobytes())
+        start = 16 + header_len
+
+        self.rows: int = header["rows"]
+        self.columns: list[str] = header["columns"]
+        self.revision: str | None = header["revision"]
+        self._arrays = {
+            name: np.frombuffer(
+                self._mm, dtype=np.dtype(spec["dtype"]), count=spec["count"],
+                offset=start + spec["offset"],
+            )
+            for name, spec in header["arrays"].items()
+        }
+        self._hashes = self._arrays["hashes"]
+        self._order = self._arrays["order"]
+
+    def _value(self, column: str, row: int) -> str:
+        offsets = self._arrays[f"offsets:{column}"]
+        return self._arrays[f"data:{column}"][offsets[row]:offsets[row + 1]].tobytes().decode()
+
+    def _find(self, member_id: str, email: str, h: int | None = None) -> int | None:
+        h = key_hash(member_id, email) if h is None else h
+        i = int(np.searchsorted(self._hashes, np.uint64(h)))
+        while i < self.rows and self._hashes[i] == h:
+            row = int(self._order[i])
+            # Confirm against the stored key; hashes may collide
+            if self._value("member_id", row) == member_id and self._value("email", row) == email:
+                return row
+            i += 1
+        return None
+
+    def lookup(self, member_id: str, email: str) -> dict | None:
+        """The record for a normalized key (values as strings), or None."""
+        row = self._find(member_id, email)
+        if row is None:
+            return None
+        return {column: self._value(column, row) for column in self.columns}
+
+    def contains(self, member_ids: Iterable[str], emails: Iterable[str]) -> np.ndarray:
+        """Boolean array: which normalized (member_id, email) pairs are in the roster."""
+        keys = list(zip(member_ids, emails))
+        hashes = np.fromiter((key_hash(m, e) for m, e in keys), dtype=np.uint64, count=len(keys))
+        pos = np.searchsorted(self._hashes, hashes)
+        hit = pos < self.rows
+        hit[hit] = self._hashes[pos[hit]] == hashes[hit]
+        # Only hash hits need the exact comparison
+        for i in np.flatnonzero(hit):
+            hit[i] = self._find(*keys[i], h=int(hashes[i])) is not None
+        return hit
+
+
+def main(argv: list[str] | None = None) -> None:
+    from .settings import settings
+    from .sheets import get_sheet_client, normalize_email, normalize_member_id
+
+    parser = argparse.ArgumentParser(description="Compile the Members roster into a snapshot.")
+    parser.add_argument("--out", default=settings.ROSTER_SNAPSHOT_PATH, help="snapshot path")
+    args = parser.parse_args(argv)
+    if not args.out:
+        parser.error("--out or ROSTER_SNAPSHOT_PATH is required")
+
+    client = get_sheet_client()
+    revision = client.roster_revision()
+    records = (
+        {
+            **record,
+            "member_id": normalize_member_id(record.get("member_id", "")),
+            "email": normalize_email(record.get("email", "")),
+        }
+        for page in client.iter_roster_pages()
+        for record in page
+    )
+    rows = write_snapshot(records, args.out, revision)
+    print(f"Wrote {rows} roster rows to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
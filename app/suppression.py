@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import sqlite3
+import threading
+import time
+from itertools import groupby
+from typing import Iterable
+
+from .settings import settings
+from .metrics import register_stats
+
+logger = logging.getLogger(__name__)
+
+# Outcomes a member can be resent for; "sent" members are never resent
+RESENDABLE_STATUSES = ("failed", "not_found", "invalid_address")
+
+# Delivery log statuses written for SendGrid webhook events, and the outcome
+# each implies (see webhooks.suppression_status). The log does not say
+# whether a bounce was a soft "blocked" one, so every bounce counts as an
+# invalid address when the index is rebuilt.
+LOGGED_EVENT_OUTCOMES = {
+    "delivered": "sent",
+    "bounced": "invalid_address",
+    "dropped": "invalid_address",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS suppression (
+    campaign_ref TEXT NOT NULL,
+    member_id TEXT NOT NULL,
+    email TEXT NOT NULL,
+    status TEXT NOT NULL,
+    ts_epoch INTEGER NOT NULL,
+    PRIMARY KEY (campaign_ref, member_id, email)
+) WITHOUT ROWID;
+"""
+
+# Latest outcome wins, except that an accepted send is only undone by
+# SendGrid's own delivery events (override_sent)
+_UPSERT = """
+INSERT INTO suppression (campaign_ref, member_id, email, status, ts_epoch)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (campaign_ref, member_id, email) DO UPDATE SET
+    status = excluded.status, ts_epoch = excluded.ts_epoch
+"""
+_KEEP_SENT = " WHERE suppression.status != 'sent'"
+
+# SQLite's default host-parameter limit is well above this
+_LOOKUP_CHUNK = 500
+
+
+class SuppressionIndex:
+    """
+    Last delivery outcome per (campaign_ref, member_id, email), fed from
+    the delivery log as the log sink flushes it.
+
+    campaign_ref is the hash of the template payload, so re-running a tab
+    with the same payload hits the same keys, and the campaign's page
+    stage can drop members that were already sent (or, with
+    `resend_statuses`, everyone whose last outcome is not one of them)
+    before any workflow is started for them.
+
+    The index is a local SQLite file: the API and every worker on a host
+    must share one SUPPRESSION_PATH, and hosts do not see each other's
+    outcomes. It can be rebuilt from the SQLite delivery ledger, the only
+    log backend that records campaign_ref (`python -m app.suppression`);
+    a new index file is backfilled from it automatically.
+    """
+
+    def __init__(self, path: str, backfill: bool = True):
+        self.path = path
+        self.backfill = backfill
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._schema_ready = False
+        self.recorded = 0
+        self.lookups = 0
+        self.suppressed = 0
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            fresh = False
+            if not self._schema_ready:
+                fresh = conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'suppression'"
+                ).fetchone() is None
+                conn.executescript(_SCHEMA)
+                self._schema_ready = True
+            self._local.conn = conn
+            if fresh and self.backfill and _ledger_backed():
+                try:
+                    rows = self.rebuild(_ledger_outcomes(), clear=False)
+                    logger.info("Backfilled suppression index from %d ledger rows", rows)
+                except Exception as e:
+                    # An empty index only means possible resends
+                    logger.warning("Suppression index backfill failed: %s", e)
+        return conn
+
+    def record(self, rows: list[dict], override_sent: bool = False) -> None:
+        """
+        Record the outcome of delivery log rows that carry a campaign_ref.
+        With `override_sent`, outcomes replace "sent" too (e.g. a bounce
+        reported after SendGrid accepted the message).
+        """
+        now = int(time.time())
+        values = [
+            (r["campaign_ref"], r["member_id"], r["email"], r["status"], now)
+            for r in rows
+            if r.get("campaign_ref") and r.get("member_id") and r.get("email")
+            and r.get("status") in ("sent", *RESENDABLE_STATUSES)
+        ]
+        if not values:
+            return
+        conn = self._conn()
+        with self._write_lock, conn:
+            conn.executemany(_UPSERT if override_sent else _UPSERT + _KEEP_SENT, values)
+        self.recorded += len(values)
+
+    def rebuild(self, batches: Iterable[list[dict]], clear: bool = True) -> int:
+        """
+        Replay delivery log rows (oldest first, in batches) into the index,
+        replacing its contents unless `clear` is False. Webhook event rows
+        (LOGGED_EVENT_OUTCOMES) override "sent" as they do when ingested.
+        Returns how many rows were replayed.
+        """
+        if clear:
+            conn = self._conn()
+            with self._write_lock, conn:
+                conn.execute("DELETE FROM suppression")
+        replayed = 0
+        for rows in batches:
+            # Keep log order between plain outcomes and event outcomes
+            for is_event, run in groupby(rows, lambda r: r["status"] in LOGGED_EVENT_OUTCOMES):
+                run = list(run)
+                if is_event:
+                    run = [{**r, "status": LOGGED_EVENT_OUTCOMES[r["status"]]} for r in run]
+                self.record(run, override_sent=is_event)
+            replayed += len(rows)
+        return replayed
+
+    def outcomes(self, campaign_ref: str, keys: list[tuple[str, str]]) -> dict[tuple[str, str], str]:
+        """Last recorded status for each (member_id, email) in `keys` that has one."""
+        self.lookups += 1
+        wanted = set(keys)
+        member_ids = sorted({m for m, _ in wanted})
+        found: dict[tuple[str, str], str] = {}
+        conn = self._conn()
+        for start in range(0, len(member_ids), _LOOKUP_CHUNK):
+            chunk = member_ids[start:start + _LOOKUP_CHUNK]
+            rows = conn.execute(
+                "SELECT member_id, email, status FROM suppression "
+                f"WHERE campaign_ref = ? AND member_id IN ({', '.join('?' for _ in chunk)})",
+                [campaign_ref, *chunk],
+            )
+            for member_id, email, status in rows:
+                if (member_id, email) in wanted:
+                    found[(member_id, email)] = status
+        return found
+
+    def stats(self) -> dict:
+        return {"recorded": self.recorded, "lookups": self.lookups, "suppressed": self.suppressed}
+
+
+_index: SuppressionIndex | None = None
+_index_lock = threading.Lock()
+
+
+def get_suppression_index() -> SuppressionIndex | None:
+    """The process-wide SuppressionIndex, or None if SUPPRESSION_PATH is unset."""
+    global _index
+    if _index is None and settings.SUPPRESSION_PATH:
+        with _index_lock:
+            if _index is None:
+                _index = SuppressionIndex(settings.SUPPRESSION_PATH)
+    return _index
+
+
+def _ledger_backed() -> bool:
+    from .sheets import get_sheet_client
+
+    return get_sheet_client().log_backend() == "sqlite"
+
+
+def _ledger_outcomes() -> Iterable[list[dict]]:
+    from .ledger import get_ledger
+
+    return get_ledger().iter_outcomes()
+
+
+def _index_stats() -> dict:
+    return _index.stats() if _index is not None else {}
+
+
+register_stats("suppression", _index_stats)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Rebuild the suppression index from the SQLite delivery ledger."
+    )
+    parser.add_argument("--path", default=settings.SUPPRESSION_PATH, help="index path")
+    args = parser.parse_args(argv)
+    if not args.path:
+        parser.error("--path or SUPPRESSION_PATH is required")
+    if not _ledger_backed():
+        parser.error("only LOG_BACKEND=sqlite records campaign_ref; nothing to rebuild from")
+
+    rows = SuppressionIndex(args.path, backfill=False).rebuild(_ledger_outcomes())
+    print(f"Rebuilt {args.path} from {rows} ledger rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,54 @@
-import gspread
-from typing import List, Dict
+from typing import Dict, Iterator
 
+from .settings import settings
+from .sheets import sheets_access, iter_worksheet_pages
 
-def get_members_from_sheet(sheet_id: str, sheet_tab: str, service_account_path: str) -> List[Dict[str, str]]:
-    gc = gspread.service_account(filename=service_account_path)
-    sh = gc.open_by_key(sheet_id)
-    worksheet = sh.worksheet(sheet_tab)
 
-    records = worksheet.get_all_records()  # returns list of dicts
-    # each dict will have keys like {"member_id": "...", "email": "...", ...}
-    return records
+def iter_members_from_sheet(
+    sheet_id: str,
+    sheet_tab: str,
+    service_account_path: str | None = None,
+    page_size: int | None = None,
+    offset: int = 0,
+) -> Iterator[Dict[str, str]]:
+    """
+    Yield compact {"member_id", "email"} records from a tab, fetched in
+    fixed-size row ranges so callers can start on the first members while
+    memory stays flat regardless of tab size.
+    """
+    # shared, long-lived client and cached worksheet handle
+    worksheet = sheets_access(service_account_path).worksheet(sheet_tab, sheet_id=sheet_id)
+
+    for page in iter_worksheet_pages(worksheet, page_size or settings.SHEETS_PAGE_SIZE, offset):
+        for record in page:
+            yield {"member_id": record.get("member_id"), "email": record.get("email")}
+
+
+def get_members_from_sheet(
+    sheet_id: str,
+    sheet_tab: str,
+    service_account_path: str | None = None,
+    offset: int = 0,
+    limit: int | None = None,
+) -> list[Dict[str, str]]:
+    """
+    Compact records in the `limit` rows starting at row `offset`, from one
+    range read. Fewer than `limit` records does not mean the tab ended
+    (trailing blank rows are left out); an empty list does.
+    """
+    worksheet = sheets_access(service_account_path).worksheet(sheet_tab, sheet_id=sheet_id)
+    pages = iter_worksheet_pages(worksheet, limit or settings.SHEETS_PAGE_SIZE, offset)
+    return [
+        {"member_id": record.get("member_id"), "email": record.get("email")}
+        for record in next(pages, [])
+    ]
+
+
+def count_members_in_sheet(
+    sheet_id: str,
+    sheet_tab: str,
+    service_account_path: str | None = None,
+) -> int:
+    """Number of member rows in a tab (header excluded), from one column read."""
+    worksheet = sheets_access(service_account_path).worksheet(sheet_tab, sheet_id=sheet_id)
+    return max(len(worksheet.col_values(1)) - 1, 0)
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import asyncio
+import inspect
+import logging
+import time
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable
+
+from .metrics import register_stats
+
+logger = logging.getLogger(__name__)
+
+
+class StartupReport:
+    """
+    Wall-clock breakdown of a process's cold start: module imports, each
+    warm-up hook and connecting to Temporal. Stages are logged once the
+    process is ready and exported as `bulk_email_startup_<stage>_seconds`.
+
+    For a per-module import profile, run the entry point under
+    `python -X importtime`.
+    """
+
+    def __init__(self, component: str, started: float | None = None):
+        self.component = component
+        self._started = started if started is not None else time.perf_counter()
+        self.stages: dict[str, float] = {}
+
+    def record(self, stage: str, seconds: float) -> None:
+        self.stages[stage] = seconds
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    async def timed(self, name: str, awaitable: Awaitable[Any]) -> Any:
+        with self.stage(name):
+            return await awaitable
+
+    def ready(self) -> None:
+        """Mark the process ready to serve and log the breakdown."""
+        self.record("total", time.perf_counter() - self._started)
+        logger.info(
+            "%s ready in %.3fs (%s)",
+            self.component,
+            self.stages["total"],
+            ", ".join(f"{k}={v:.3f}s" for k, v in self.stages.items() if k != "total"),
+        )
+
+    def stats(self) -> dict:
+        return {f"{k}_seconds": v for k, v in self.stages.items()}
+
+
+def startup_report(component: str, import_started: float) -> StartupReport:
+    """
+    Create and export the report for this process. `import_started` is a
+    perf_counter() taken at the top of the entry module, before its imports.
+    """
+    report = StartupReport(component, started=import_started)
+    report.record("imports", time.perf_counter() - import_started)
+    register_stats("startup", report.stats)
+    return report
+
+
+async def _call(hook: Callable[[], Any]) -> Any:
+    if inspect.iscoroutinefunction(hook):
+        return await hook()
+    # Sync hooks are mostly imports and blocking I/O
+    return await asyncio.to_thread(hook)
+
+
+async def warm_up(report: StartupReport, hooks: dict[str, Callable[[], Any]]) -> None:
+    """
+    Run warm-up hooks concurrently, timing each as `warmup_<name>`.
+
+    Warm-up is best effort: a failing hook is logged and the work it would
+    have done simply happens on first use instead.
+    """
+
+    async def run(name: str, hook: Callable[[], Any]) -> None:
+        try:
+            await report.timed(f"warmup_{name}", _call(hook))
+        except Exception as e:
+            logger.warning("Warm-up %r failed, deferring to first use: %s", name, e)
+
+    await asyncio.gather(*(run(name, hook) for name, hook in hooks.items()))
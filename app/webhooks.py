@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from functools import lru_cache
+
+from .settings import settings
+from .ratelimit import RateLimitBusy
+from .sheets import get_sheet_client, log_event_id
+from .suppression import get_suppression_index
+from .metrics import register_stats
+
+logger = logging.getLogger(__name__)
+
+SIGNATURE_HEADER = "X-Twilio-Email-Event-Webhook-Signature"
+TIMESTAMP_HEADER = "X-Twilio-Email-Event-Webhook-Timestamp"
+
+# SendGrid event -> delivery log status. Other events (processed, deferred,
+# open, click...) are acknowledged and dropped.
+LOGGED_EVENTS = {
+    "delivered": "delivered",
+    "bounce": "bounced",
+    "dropped": "dropped",
+    "spamreport": "spam_report",
+    "unsubscribe": "unsubscribed",
+    "group_unsubscribe": "unsubscribed",
+}
+
+
+class WebhookSignatureError(Exception):
+    """The request is not a fresh, correctly signed SendGrid event batch."""
+
+
+@lru_cache(maxsize=1)
+def _verifier(public_key: str):
+    from sendgrid.helpers.eventwebhook import EventWebhook
+
+    return EventWebhook(public_key)
+
+
+def verify_signature(body: bytes, signature: str | None, timestamp: str | None) -> None:
+    """
+    Check SendGrid's ECDSA signature over timestamp + body; raises
+    WebhookSignatureError. CPU-bound, so call it off the event loop.
+    """
+    if not signature or not timestamp:
+        raise WebhookSignatureError("Missing signature headers")
+    try:
+        age = abs(time.time() - int(timestamp))
+    except ValueError:
+        raise WebhookSignatureError("Bad signature timestamp") from None
+    if age > settings.SENDGRID_WEBHOOK_MAX_AGE_SECONDS:
+        raise WebhookSignatureError("Stale signature timestamp")
+
+    webhook = _verifier(settings.SENDGRID_WEBHOOK_PUBLIC_KEY)
+    try:
+        valid = webhook.verify_signature(body.decode(), signature, timestamp)
+    except Exception:  # undecodable signature or body
+        valid = False
+    if not valid:
+        raise WebhookSignatureError("Invalid signature")
+
+
+def event_log_row(event: dict) -> dict | None:
+    """Delivery log row for a SendGrid event, or None if it is not logged."""
+    status = LOGGED_EVENTS.get(event.get("event"))
+    if status is None:
+        return None
+    row = {
+        "campaign_id": event.get("campaign_id", ""),
+        "campaign_ref": event.get("campaign_ref", ""),
+        "workflow_id": event.get("workflow_id", ""),
+        "run_id": event.get("run_id", ""),
+        "member_id": event.get("member_id", ""),
+        "email": str(event.get("email", "")).strip().lower(),
+        "status": status,
+        "message": str(event.get("reason") or event.get("response") or event.get("type") or ""),
+        "sendgrid_status": str(event.get("status", "")),
+    }
+    row["event_id"] = event.get("sg_event_id") or log_event_id(row)
+    return row
+
+
+def suppression_status(event: dict) -> str | None:
+    """Outcome an event implies for re-runs; None leaves the recorded one."""
+    kind = event.get("event")
+    if kind == "delivered":
+        return "sent"
+    if kind == "bounce":
+        # "blocked" is a soft bounce (reputation, throttling): worth retrying
+        return "failed" if event.get("type") == "blocked" else "invalid_address"
+    if kind == "dropped":
+        return "invalid_address"
+    return None
+
+
+class WebhookIngestor:
+    """
+    Buffers verified SendGrid events in the API process and writes them in
+    bulk: one delivery log append and one suppression index upsert per
+    flush, every SENDGRID_WEBHOOK_FLUSH_SECONDS or SENDGRID_WEBHOOK_FLUSH_ROWS
+    events.
+
+    `submit()` never waits on a write, so the webhook answers as soon as a
+    batch is verified. Once SENDGRID_WEBHOOK_MAX_PENDING events are
+    buffered (e.g. the log backend is down) it refuses new batches, and
+    SendGrid retries them later. Failed flushes keep their events at the
+    head of the buffer and are retried with dedupe on.
+    """
+
+    def __init__(self):
+        self._pending: list[dict] = []
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._closing = False
+        self._dedupe_next = False
+
+        self.received = 0
+        self.rejected = 0
+        self.flushes = 0
+        self.flush_failures = 0
+        self.rows_written = 0
+        self.last_flush_seconds = 0.0
+
+    def _ensure_started(self) -> None:
+        if self._task is None or self._task.done():
+            self._closing = False
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    def submit(self, events: list[dict]) -> bool:
+        """Buffer a batch of events; False if the buffer is full."""
+        self._ensure_started()
+        if len(self._pending) + len(events) > settings.SENDGRID_WEBHOOK_MAX_PENDING:
+            self.rejected += len(events)
+            return False
+        self._pending.extend(events)
+        self.received += len(events)
+        if len(self._pending) >= settings.SENDGRID_WEBHOOK_FLUSH_ROWS:
+            self._wakeup.set()
+        return True
+
+    async def _run(self) -> None:
+        while not self._closing:
+            try:
+                await asyncio.wait_for(
+                    self._wakeup.wait(), timeout=settings.SENDGRID_WEBHOOK_FLUSH_SECONDS
+                )
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                while self._pending:
+                    await self.flush()
+            except Exception as e:
+                logger.warning("Webhook event flush failed, will retry: %s", e)
+
+    async def flush(self) -> None:
+        """Write up to SENDGRID_WEBHOOK_FLUSH_ROWS buffered events; raises on failure."""
+        batch = self._pending[:settings.SENDGRID_WEBHOOK_FLUSH_ROWS]
+        if not batch:
+            return
+
+        start = time.perf_counter()
+        dedupe = self._dedupe_next
+        # Until the write is known to have landed (or not), including when
+        # this flush is cancelled mid-write, the next one dedupes
+        self._dedupe_next = True
+        try:
+            await asyncio.to_thread(self._write, batch, dedupe)
+        except RateLimitBusy:
+            # Refused before anything was written
+            self._dedupe_next = dedupe
+            self.flush_failures += 1
+            raise
+        except Exception:
+            self.flush_failures += 1
+            raise
+        self._dedupe_next = False
+        del self._pending[:len(batch)]
+
+        self.flushes += 1
+        self.last_flush_seconds = time.perf_counter() - start
+
+    def _write(self, events: list[dict], dedupe: bool = False) -> None:
+        rows = [event_log_row(event) for event in events]
+        logged = [row for row in rows if row is not None]
+        get_sheet_client().append_log_rows(logged, dedupe)
+        self.rows_written += len(logged)
+
+        index = get_suppression_index()
+        if index is not None:
+            outcomes = []
+            for event, row in zip(events, rows):
+                status = suppression_status(event)
+                if status is not None and row is not None:
+                    outcomes.append({**row, "status": status})
+            index.record(outcomes, override_sent=True)
+
+    async def close(self) -> None:
+        """Stop the background flusher and write what is left."""
+        if self._task is not None:
+            # Let an in-flight flush finish rather than cancelling it mid-write
+            self._closing = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        try:
+            while self._pending:
+                await self.flush()
+        except Exception as e:
+            logger.error("Dropping %d webhook events on shutdown: %s", len(self._pending), e)
+
+    def stats(self) -> dict:
+        return {
+            "buffered": len(self._pending),
+            "received": self.received,
+            "rejected": self.rejected,
+            "flushes": self.flushes,
+            "flush_failures": self.flush_failures,
+            "rows_written": self.rows_written,
+            "last_flush_seconds": self.last_flush_seconds,
+        }
+
+
+webhook_ingestor = WebhookIngestor()
+register_stats("sendgrid_webhook", webhook_ingestor.stats)
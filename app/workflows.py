@@ -1,16 +1,96 @@
 from __future__ import annotations
 
-from datetime import timedelta
+import asyncio
+import math
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from itertools import islice
 from temporalio import workflow
 from temporalio.common import RetryPolicy
+from temporalio.exceptions import ActivityError, ApplicationError
+from temporalio.exceptions import TimeoutError as ActivityTimeoutError
 
 # Import activities in a workflow-safe way
 with workflow.unsafe.imports_passed_through():
     from .activities import (
+        count_member_rows,
+        fetch_verified_page,
+        store_campaign_payload,
         lookup_member_in_sheet,
         send_email_via_sendgrid,
+        send_email_batch,
         log_delivery_event,
+        log_delivery_events,
+        send_and_log_email,
+        DELIVERY_LOG_ERROR,
     )
+    from . import prevalidate
+    from .deliverability import INVALID_ADDRESS_ERROR
+    from .sheets import log_event_id
+
+
+# Workflows are replayed from their history, so changing which activities,
+# timers or children a run schedules breaks runs already in flight. Gate
+# such changes with workflow.patched(), or drain running campaigns and
+# their members before deploying a worker that schedules differently.
+
+# Sends: back off longer than the default, and never retry what SendGrid
+# (or the address check) rejected outright. Transient errors may also set
+# their own next retry delay (Retry-After, open circuit breaker).
+SEND_RETRY = RetryPolicy(
+    initial_interval=timedelta(seconds=2),
+    maximum_interval=timedelta(minutes=1),
+    maximum_attempts=5,
+    non_retryable_error_types=["PermanentSendError", INVALID_ADDRESS_ERROR],
+)
+
+
+def _failure_message(e: Exception) -> str:
+    """The activity's own error ("Type: message") rather than the generic wrapper."""
+    if isinstance(e, ActivityError) and isinstance(e.cause, ApplicationError):
+        return f"{e.cause.type}: {e.cause.message}"
+    return str(e)
+
+
+def _unlogged_outcome(e: Exception) -> dict | None:
+    """
+    The outcome a failed send_and_log_email had already reached (from the
+    log error or its last heartbeat), or None if it never got that far.
+    """
+    if not isinstance(e, ActivityError):
+        return None
+    cause = e.cause
+    if isinstance(cause, ApplicationError) and cause.type == DELIVERY_LOG_ERROR:
+        details = cause.details
+    elif isinstance(cause, ActivityTimeoutError):
+        details = cause.last_heartbeat_details
+    else:
+        return None
+    return details[0] if details else None
+
+
+def _campaign_log_row(info: workflow.Info, campaign_ref: str | None, row: dict) -> dict:
+    # Rows the campaign logs itself belong to the campaign's own workflow
+    return {
+        "campaign_id": info.workflow_id,
+        "campaign_ref": campaign_ref or "",
+        "workflow_id": info.workflow_id,
+        "run_id": info.run_id,
+        **row,
+    }
+
+
+async def _report_to_campaign(campaign_id: str | None, outcome: str) -> None:
+    """Tell the parent campaign (if any) how this member finished."""
+    if not campaign_id:
+        return
+    try:
+        await workflow.get_external_workflow_handle(campaign_id).signal(
+            "member_finished", outcome
+        )
+    except Exception as e:
+        # Campaign may already be closed; progress is best-effort
+        workflow.logger.warning("Could not report %s to %s: %s", outcome, campaign_id, e)
 
 
 @workflow.defn
@@ -21,36 +101,74 @@ class NotifyMemberWorkflow:
         member_id: str,
         email: str,
         template_payload: dict | None = None,
+        campaign_id: str | None = None,
+        verification_token: str | None = None,
+        campaign_ref: str | None = None,
+        lean: bool = False,
+    ) -> str:
+        # Report from `finally`, so the campaign hears about every member
+        # even if logging its outcome fails or the run is cancelled
+        outcome = "FAILED"
+        try:
+            outcome = await self._deliver(
+                member_id, email, template_payload, campaign_id, verification_token,
+                campaign_ref, lean,
+            )
+            return outcome
+        finally:
+            await _report_to_campaign(campaign_id, outcome)
+
+    async def _deliver(
+        self,
+        member_id: str,
+        email: str,
+        template_payload: dict | None,
+        campaign_id: str | None,
+        verification_token: str | None,
+        campaign_ref: str | None,
+        lean: bool,
     ) -> str:
         retry = RetryPolicy(maximum_attempts=3)
         info = workflow.info()  # includes workflow_id and run_id
 
-        # 1) Validate presence in sheet
-        lookup = await workflow.execute_activity(
-            lookup_member_in_sheet,
-            args=[member_id, email],
-            start_to_close_timeout=timedelta(seconds=15),
-            retry_policy=retry,
+        # 1) Validate presence in sheet, unless the campaign already did
+        verified = bool(campaign_id and verification_token) and (
+            verification_token == prevalidate.verification_token(campaign_id, member_id, email)
         )
+        if lean:
+            return await self._run_lean(
+                member_id, email, template_payload, campaign_id, campaign_ref, verified, retry
+            )
 
-        if not lookup.get("found"):
-            await workflow.execute_activity(
-                log_delivery_event,
-                args=[
-                    info.workflow_id,
-                    info.run_id,
-                    member_id,
-                    email,
-                    "not_found",
-                    "Member/email not present in sheet",
-                    ""
-                ],
-                start_to_close_timeout=timedelta(seconds=10),
+        if not verified:
+            lookup = await workflow.execute_activity(
+                lookup_member_in_sheet,
+                args=[member_id, email],
+                start_to_close_timeout=timedelta(seconds=15),
                 retry_policy=retry,
             )
-            return "NOT_FOUND"
 
-        # 2) Send email (with guard to log failures)
+            if not lookup.get("found"):
+                await workflow.execute_activity(
+                    log_delivery_event,
+                    args=[
+                        info.workflow_id,
+                        info.run_id,
+                        member_id,
+                        email,
+                        "not_found",
+                        prevalidate.NOT_FOUND_MESSAGE,
+                        "",
+                        campaign_id or "",
+                        campaign_ref or "",
+                    ],
+                    start_to_close_timeout=timedelta(seconds=10),
+                    retry_policy=retry,
+                )
+                return "NOT_FOUND"
+
+        # 2) Send email (with guard to log failures). Campaign members get
+        #    only `campaign_ref`; the activity resolves the shared payload.
         dynamic_data = {"member_id": member_id}
         if template_payload:
             dynamic_data.update(template_payload)
@@ -58,9 +176,9 @@ class NotifyMemberWorkflow:
         try:
             sg_status = await workflow.execute_activity(
                 send_email_via_sendgrid,
-                args=[email, dynamic_data],
+                args=[email, dynamic_data, campaign_ref, campaign_id],
                 start_to_close_timeout=timedelta(seconds=30),
-                retry_policy=retry,
+                retry_policy=SEND_RETRY,
             )
 
             await workflow.execute_activity(
@@ -72,7 +190,9 @@ class NotifyMemberWorkflow:
                     email,
                     "sent",
                     f"SendGrid status {sg_status}",
-                    str(sg_status)
+                    str(sg_status),
+                    campaign_id or "",
+                    campaign_ref or "",
                 ],
                 start_to_close_timeout=timedelta(seconds=10),
                 retry_policy=retry,
@@ -80,6 +200,12 @@ class NotifyMemberWorkflow:
             return "SENT"
 
         except Exception as e:
+            # Undeliverable address: SendGrid was never called, nothing to retry
+            invalid = (
+                isinstance(e, ActivityError)
+                and isinstance(e.cause, ApplicationError)
+                and e.cause.type == INVALID_ADDRESS_ERROR
+            )
             await workflow.execute_activity(
                 log_delivery_event,
                 args=[
@@ -87,11 +213,624 @@ class NotifyMemberWorkflow:
                     info.run_id,
                     member_id,
                     email,
-                    "failed",
-                    str(e),
-                    ""
+                    "invalid_address" if invalid else "failed",
+                    e.cause.message if invalid else _failure_message(e),
+                    "",
+                    campaign_id or "",
+                    campaign_ref or "",
                 ],
                 start_to_close_timeout=timedelta(seconds=10),
                 retry_policy=retry,
             )
+            if invalid:
+                return "INVALID_ADDRESS"
             raise
+
+    async def _run_lean(
+        self,
+        member_id: str,
+        email: str,
+        template_payload: dict | None,
+        campaign_id: str | None,
+        campaign_ref: str | None,
+        verified: bool,
+        retry: RetryPolicy,
+    ) -> str:
+        """
+        Same outcomes as the regular path with a single scheduled activity
+        per member: the roster lookup and log-only outcomes run as local
+        activities (one marker event, no task-queue round trip) and sending
+        plus logging the result is the fused send_and_log_email.
+        """
+        info = workflow.info()
+
+        async def log_local(status: str, message: str, sendgrid_status: str = "") -> None:
+            await workflow.execute_local_activity(
+                log_delivery_event,
+                args=[
+                    info.workflow_id, info.run_id, member_id, email, status, message,
+                    sendgrid_status, campaign_id or "", campaign_ref or "",
+                ],
+                start_to_close_timeout=timedelta(seconds=10),
+                retry_policy=retry,
+            )
+
+        if not verified:
+            lookup = await workflow.execute_local_activity(
+                lookup_member_in_sheet,
+                args=[member_id, email],
+                start_to_close_timeout=timedelta(seconds=15),
+                retry_policy=retry,
+            )
+            if not lookup.get("found"):
+                await log_local("not_found", prevalidate.NOT_FOUND_MESSAGE)
+                return "NOT_FOUND"
+
+        dynamic_data = {"member_id": member_id}
+        if template_payload:
+            dynamic_data.update(template_payload)
+
+        try:
+            outcome = await workflow.execute_activity(
+                send_and_log_email,
+                args=[
+                    info.workflow_id, info.run_id, member_id, email, dynamic_data, campaign_ref,
+                    campaign_id,
+                ],
+                start_to_close_timeout=timedelta(seconds=45),
+                retry_policy=SEND_RETRY,
+            )
+        except Exception as e:
+            outcome = _unlogged_outcome(e)
+            if outcome is None:
+                await log_local("failed", _failure_message(e))
+                raise
+            # The send went through (or was rejected) but its log write kept
+            # failing: log what actually happened, not a failure
+            await log_local(outcome["status"], outcome["message"], outcome["sendgrid_status"])
+
+        # Logged, by the activity or above, including permanent SendGrid rejections
+        return {"sent": "SENT", "invalid_address": "INVALID_ADDRESS"}.get(
+            outcome["status"], "FAILED"
+        )
+
+
+# Pages dispatched per run before continuing-as-new, to keep history small
+CAMPAIGN_PAGES_PER_RUN = 20
+
+# Most recent per-member outcomes kept for the `events` query, and the most
+# returned by one query
+CAMPAIGN_EVENT_BUFFER = 5000
+CAMPAIGN_EVENTS_PER_QUERY = 1000
+
+# Pause dispatching when at least this share of the last CAMPAIGN_ERROR_WINDOW
+# send outcomes (once CAMPAIGN_ERROR_MIN_SAMPLES are in) failed
+CAMPAIGN_ERROR_WINDOW = 50
+CAMPAIGN_ERROR_MIN_SAMPLES = 20
+CAMPAIGN_ERROR_RATE_PAUSE = 0.5
+CAMPAIGN_ERROR_PAUSE = timedelta(minutes=5)
+
+# Give up on members that have not reported back (terminated or timed-out
+# children never do) once none has reported for this long
+CAMPAIGN_REPORT_TIMEOUT = timedelta(hours=1)
+
+# Paced campaigns start members in groups, one timer per group; slots are
+# rounded up to this many seconds so nearby members share a timer
+CAMPAIGN_PACING_TICK_SECONDS = 1.0
+
+
+@workflow.defn
+class NotifyCampaignWorkflow:
+    """
+    Page through a sheet tab and start one NotifyMemberWorkflow child per
+    member, with at most `max_concurrency` starts in flight. Children report
+    back via the `member_finished` signal; the campaign completes once every
+    started member has finished, or once none has reported back for
+    CAMPAIGN_REPORT_TIMEOUT, counting the rest as failed.
+
+    Each page is pre-validated in bulk (normalized, deduped, joined against
+    the roster) as it is fetched; only verified members are dispatched, with
+    a verification token that lets the child skip its own roster lookup.
+    Rejected rows are logged with one activity per page.
+
+    Members already sent this payload by an earlier campaign are
+    suppressed at the same stage, before anything is started for them;
+    with `resend_statuses`, only members whose last outcome is one of
+    those statuses are sent again, and with `resend_all` nobody is
+    suppressed.
+
+    The template payload is stored once (store_campaign_payload) and only
+    its `campaign_ref` is passed on, to children and across continue-as-new.
+
+    With `lean`, children use NotifyMemberWorkflow's lean path (local
+    activities plus one fused send-and-log activity).
+
+    With `batch_send`, no children are started: each page is sent through
+    SendGrid personalizations and logged per member directly.
+
+    Every member's dispatch outcome (child started, start failed, rejected,
+    or sent/failed in batch mode) is appended to a bounded event buffer
+    that the `events` query pages through, for streaming to the caller.
+
+    If sends start failing en masse (see CAMPAIGN_ERROR_RATE_PAUSE), the
+    campaign stops starting members for CAMPAIGN_ERROR_PAUSE instead of
+    burning quota and retries during a SendGrid outage or misconfiguration.
+
+    With `pacing` ({"window_minutes", "domain_per_minute"}), each page is
+    planned into send slots before dispatch: members are spaced evenly so
+    the rows left in the tab finish by the end of the window, and no
+    recipient domain gets more than `domain_per_minute` sends a minute.
+    Waits are workflow timers, so no worker is held while a campaign is
+    paced, and progress carries the projected completion time.
+    """
+
+    def __init__(self) -> None:
+        self._progress = {
+            "queued": 0,
+            "started": 0,
+            "start_failed": 0,
+            "sent": 0,
+            "not_found": 0,
+            "failed": 0,
+            "skipped": 0,
+            "invalid_address": 0,
+            "suppressed": 0,  # already handled by an earlier run of this payload
+            "finished": 0,  # children that reported back (or were given up on)
+            "unreported": 0,  # given up on after CAMPAIGN_REPORT_TIMEOUT; counted as failed
+            "events": 0,  # sequence number of the next dispatch event
+            "pauses": 0,
+            "paused": False,
+            "dispatched": False,
+            "total": 0,  # rows in the tab, counted for paced campaigns
+            "projected_completion": None,  # ISO time, paced campaigns only
+        }
+        self._lean = False
+        self._pacing: dict = {}
+        self._events: deque[dict] = deque(maxlen=CAMPAIGN_EVENT_BUFFER)
+        self._recent_sends: deque[bool] = deque(maxlen=CAMPAIGN_ERROR_WINDOW)
+        self._pause_due = False
+
+    @workflow.signal
+    def member_finished(self, outcome: str) -> None:
+        key = {
+            "SENT": "sent",
+            "NOT_FOUND": "not_found",
+            "INVALID_ADDRESS": "invalid_address",
+        }.get(outcome, "failed")
+        self._progress[key] += 1
+        self._progress["finished"] += 1
+        if key in ("sent", "failed"):
+            self._record_send(key == "sent")
+
+    @workflow.query
+    def progress(self) -> dict:
+        return dict(self._progress)
+
+    @workflow.query
+    def events(self, after: int) -> dict:
+        """
+        Dispatch events with sequence number >= `after`, oldest first, plus
+        the current progress. `dropped` counts requested events that have
+        already left the buffer (or were emitted by an earlier run).
+        """
+        first = self._progress["events"] - len(self._events)
+        start = max(after, first)
+        batch = list(
+            islice(self._events, start - first, start - first + CAMPAIGN_EVENTS_PER_QUERY)
+        )
+        return {
+            "events": batch,
+            "next": start + len(batch),
+            "dropped": start - after,
+            "progress": dict(self._progress),
+        }
+
+    def _emit(self, member_id: str, email: str, status: str, **extra) -> None:
+        self._events.append(
+            {
+                "seq": self._progress["events"],
+                "member_id": member_id,
+                "email": email,
+                "status": status,
+                **extra,
+            }
+        )
+        self._progress["events"] += 1
+
+    def _record_send(self, ok: bool) -> None:
+        if self._progress["paused"]:
+            return  # stragglers from before the pause
+        self._recent_sends.append(ok)
+        samples = len(self._recent_sends)
+        failures = samples - sum(self._recent_sends)
+        if (
+            samples >= CAMPAIGN_ERROR_MIN_SAMPLES
+            and failures / samples >= CAMPAIGN_ERROR_RATE_PAUSE
+        ):
+            self._pause_due = True
+
+    async def _wait_if_paused(self) -> None:
+        """Hold new sends while an error-rate pause is in effect."""
+        if self._progress["paused"]:
+            await workflow.wait_condition(lambda: not self._progress["paused"])
+            return
+        if not self._pause_due:
+            return
+
+        self._pause_due = False
+        self._progress["paused"] = True
+        self._progress["pauses"] += 1
+        workflow.logger.warning(
+            "Send error rate %d/%d; pausing dispatch for %s",
+            len(self._recent_sends) - sum(self._recent_sends),
+            len(self._recent_sends),
+            CAMPAIGN_ERROR_PAUSE,
+        )
+        await workflow.sleep(CAMPAIGN_ERROR_PAUSE)
+        # Judge the resumed traffic on its own
+        self._recent_sends.clear()
+        self._pause_due = False
+        self._progress["paused"] = False
+
+    def _finished(self) -> int:
+        return self._progress["finished"]
+
+    def _members_done(self) -> bool:
+        return (
+            self._finished() >= self._progress["started"]
+            or workflow.info().is_continue_as_new_suggested()
+        )
+
+    async def _wait_for_members(self) -> None:
+        """
+        Wait until every started member has reported back, checking every
+        CAMPAIGN_REPORT_TIMEOUT whether any still are; if none has since the
+        last check, count the missing ones as failed and stop waiting.
+        """
+        while not self._members_done():
+            reported = self._finished()
+            try:
+                await workflow.wait_condition(
+                    self._members_done, timeout=CAMPAIGN_REPORT_TIMEOUT
+                )
+            except asyncio.TimeoutError:
+                if self._finished() > reported:
+                    continue
+                missing = self._progress["started"] - self._finished()
+                workflow.logger.warning(
+                    "No member reported back for %s; counting %d as failed",
+                    CAMPAIGN_REPORT_TIMEOUT,
+                    missing,
+                )
+                self._progress["unreported"] += missing
+                self._progress["failed"] += missing
+                self._progress["finished"] += missing
+
+    @workflow.run
+    async def run(
+        self,
+        sheet_tab: str,
+        template_payload: dict | None = None,
+        page_size: int = 500,
+        max_concurrency: int = 50,
+        batch_send: bool = False,
+        offset: int = 0,
+        progress: dict | None = None,
+        campaign_ref: str | None = None,
+        lean: bool = False,
+        resend_statuses: list[str] | None = None,
+        pacing: dict | None = None,
+        resend_all: bool = False,
+    ) -> dict:
+        retry = RetryPolicy(maximum_attempts=3)
+        self._lean = lean
+        if progress:
+            self._progress.update(progress)
+            if "finished" not in progress:
+                # Continued from a run that only counted outcomes
+                self._progress["finished"] = (
+                    progress["sent"] + progress["not_found"] + progress["failed"]
+                )
+
+        if template_payload and not campaign_ref:
+            campaign_ref = await workflow.execute_activity(
+                store_campaign_payload,
+                args=[template_payload],
+                start_to_close_timeout=timedelta(seconds=30),
+                retry_policy=retry,
+            )
+
+        if pacing:
+            self._pacing = {"next_at": 0.0, "domains": {}, **pacing}
+            if "started_at" not in self._pacing:
+                self._pacing["started_at"] = workflow.now().timestamp()
+                self._progress["total"] = await workflow.execute_activity(
+                    count_member_rows,
+                    args=[sheet_tab],
+                    start_to_close_timeout=timedelta(seconds=60),
+                    retry_policy=retry,
+                )
+
+        def fetch(at: int):
+            return workflow.start_activity(
+                fetch_verified_page,
+                args=[
+                    sheet_tab, at, page_size, workflow.info().workflow_id,
+                    # No suppression key: nobody counts as already sent
+                    None if resend_all else campaign_ref, resend_statuses,
+                ],
+                # First page of a run may rebuild the roster index
+                start_to_close_timeout=timedelta(seconds=120),
+                retry_policy=retry,
+            )
+
+        pages = 0
+        next_page = None if self._progress["dispatched"] else fetch(offset)
+        while next_page is not None:
+            page = await next_page
+            offset += page["fetched"]
+            pages += 1
+
+            # A short page may just end in blank rows; only an empty one ends the tab
+            last = not page["fetched"]
+            can_due = (
+                pages >= CAMPAIGN_PAGES_PER_RUN
+                or workflow.info().is_continue_as_new_suggested()
+            )
+            # Load the following page while this one is being dispatched
+            next_page = fetch(offset) if not last and not can_due else None
+
+            members = page["verified"]
+            self._progress["queued"] += len(members)
+            if self._pacing:
+                remaining = max(self._progress["total"] - offset, 0)
+                plan = self._plan(members, page["fetched"], remaining)
+            else:
+                plan = [(None, members)]
+            send = self._run_plan(plan, batch_send, campaign_ref, max_concurrency, retry)
+            await asyncio.gather(
+                send,
+                self._log_rejected(
+                    page["rejected"], offset - page["fetched"], campaign_ref, retry
+                ),
+            )
+
+            if last:
+                self._progress["dispatched"] = True
+            elif can_due:
+                self._continue_as_new(
+                    sheet_tab, campaign_ref, page_size, max_concurrency, batch_send, offset,
+                    resend_statuses, resend_all,
+                )
+
+        # Wait for every started member to report back, or the report timeout
+        await self._wait_for_members()
+        if self._finished() < self._progress["started"]:
+            self._continue_as_new(
+                sheet_tab, campaign_ref, page_size, max_concurrency, batch_send, offset,
+                resend_statuses, resend_all,
+            )
+
+        return dict(self._progress)
+
+    def _continue_as_new(
+        self,
+        sheet_tab: str,
+        campaign_ref: str | None,
+        page_size: int,
+        max_concurrency: int,
+        batch_send: bool,
+        offset: int,
+        resend_statuses: list[str] | None,
+        resend_all: bool,
+    ) -> None:
+        # Pacing config plus its schedule state, so caps hold across runs
+        workflow.continue_as_new(
+            args=[
+                sheet_tab,
+                None,  # payload already stored; carried as campaign_ref
+                page_size,
+                max_concurrency,
+                batch_send,
+                offset,
+                self._progress,
+                campaign_ref,
+                self._lean,
+                resend_statuses,
+                self._pacing or None,
+                resend_all,
+            ]
+        )
+
+    def _plan(
+        self,
+        members: list[dict],
+        fetched: int,
+        remaining: int,
+    ) -> list[tuple[float, list[dict]]]:
+        """
+        Assign each member of a page a start time (epoch seconds) and group
+        them by CAMPAIGN_PACING_TICK_SECONDS slot, in time order.
+
+        Each fetched row gets an equal share of what is left of the window
+        (the page's rows plus the `remaining` rows after it), and the
+        page's members are spread evenly over the page's share. A member
+        whose domain has used its per-minute allowance moves to the
+        domain's next slot without holding back the others.
+        """
+        now = workflow.now().timestamp()
+        interval = 0.0
+        window = self._pacing.get("window_minutes")
+        if window:
+            deadline = self._pacing["started_at"] + window * 60
+            interval = max(deadline - now, 0.0) / max(fetched + remaining, 1)
+        per_domain = self._pacing.get("domain_per_minute")
+        domain_interval = 60.0 / per_domain if per_domain else 0.0
+
+        # Only future slots matter; keeps the carried state small
+        domains = {d: t for d, t in self._pacing["domains"].items() if t > now}
+        start = max(self._pacing["next_at"], now)
+        step = interval * fetched / max(len(members), 1)
+        groups: dict[float, list[dict]] = {}
+        for i, member in enumerate(members):
+            at = start + i * step
+            if domain_interval:
+                domain = member["email"].rpartition("@")[2]
+                at = max(at, domains.get(domain, now))
+                domains[domain] = at + domain_interval
+            if at > now:
+                tick = CAMPAIGN_PACING_TICK_SECONDS
+                at = math.ceil(at / tick) * tick
+            groups.setdefault(max(at, now), []).append(member)
+        self._pacing["next_at"] = start + fetched * interval
+        self._pacing["domains"] = domains
+
+        # Remaining rows at this page's observed pace (or the window's, if slower)
+        last = max(groups, default=now)
+        per_row = max((last - now) / max(fetched, 1), interval)
+        done_at = max(last, self._pacing["next_at"]) + remaining * per_row
+        self._progress["projected_completion"] = datetime.fromtimestamp(
+            done_at, tz=timezone.utc
+        ).isoformat()
+        return sorted(groups.items())
+
+    async def _run_plan(
+        self,
+        plan: list[tuple[float | None, list[dict]]],
+        batch_send: bool,
+        campaign_ref: str | None,
+        max_concurrency: int,
+        retry: RetryPolicy,
+    ) -> None:
+        for at, group in plan:
+            if at is not None:
+                delay = at - workflow.now().timestamp()
+                if delay > 0:
+                    await workflow.sleep(delay)
+            if batch_send:
+                await self._send_batched(group, campaign_ref, retry)
+            else:
+                await self._dispatch(group, campaign_ref, max_concurrency)
+
+    async def _log_rejected(
+        self,
+        rejected: list[dict],
+        page_offset: int,
+        campaign_ref: str | None,
+        retry: RetryPolicy,
+    ) -> None:
+        for row in rejected:
+            status = row["status"]
+            self._progress[
+                status if status in ("not_found", "invalid_address", "suppressed") else "skipped"
+            ] += 1
+            self._emit(row["member_id"], row["email"], status.upper(), message=row["message"])
+
+        info = workflow.info()
+        rows = []
+        for i, row in enumerate(rejected):
+            # Suppressed members already have their outcome in the log
+            if row["status"] == "suppressed":
+                continue
+            row = _campaign_log_row(info, campaign_ref, row)
+            # Repeated sheet rows (duplicates, blanks) share a log event key;
+            # their position on the page keeps each one's event id apart
+            rows.append({**row, "event_id": f"{log_event_id(row)}-{page_offset}-{i}"})
+        if not rows:
+            return
+
+        await workflow.execute_activity(
+            log_delivery_events,
+            args=[rows],
+            start_to_close_timeout=timedelta(seconds=60),
+            retry_policy=retry,
+        )
+
+    async def _send_batched(
+        self,
+        members: list[dict],
+        campaign_ref: str | None,
+        retry: RetryPolicy,
+    ) -> None:
+        if not members:
+            return
+
+        info = workflow.info()
+        recipients = []
+        for member in members:
+            recipients.append(
+                {"email": member["email"], "dynamic_template_data": {"member_id": member["member_id"]}}
+            )
+
+        await self._wait_if_paused()
+        try:
+            # Single attempt: a retried batch would re-send to everyone in it
+            results = await workflow.execute_activity(
+                send_email_batch,
+                args=[recipients, campaign_ref],
+                start_to_close_timeout=timedelta(seconds=120),
+                retry_policy=RetryPolicy(maximum_attempts=1),
+            )
+        except Exception as e:
+            results = [{"status": "failed", "message": str(e), "sendgrid_status": ""}] * len(recipients)
+
+        rows = []
+        for member, result in zip(members, results):
+            self._progress["sent" if result["status"] == "sent" else "failed"] += 1
+            self._record_send(result["status"] == "sent")
+            self._emit(
+                member["member_id"], member["email"], result["status"].upper(),
+                message=result["message"],
+            )
+            rows.append(
+                {
+                    "member_id": member["member_id"],
+                    "email": member["email"],
+                    "status": result["status"],
+                    "message": result["message"],
+                    "sendgrid_status": result["sendgrid_status"],
+                }
+            )
+
+        await workflow.execute_activity(
+            log_delivery_events,
+            args=[[_campaign_log_row(info, campaign_ref, row) for row in rows]],
+            start_to_close_timeout=timedelta(seconds=60),
+            retry_policy=retry,
+        )
+
+    async def _dispatch(
+        self,
+        members: list[dict],
+        campaign_ref: str | None,
+        max_concurrency: int,
+    ) -> None:
+        sem = asyncio.Semaphore(max_concurrency)
+        campaign_id = workflow.info().workflow_id
+
+        async def start_one(member_id: str, email: str, token: str) -> None:
+            async with sem:
+                await self._wait_if_paused()
+                try:
+                    child = await workflow.start_child_workflow(
+                        NotifyMemberWorkflow.run,
+                        args=[
+                            member_id, email, None, campaign_id, token, campaign_ref, self._lean
+                        ],
+                        id=f"notify-{member_id}-{email}",
+                        # Members keep running across continue-as-new and campaign completion
+                        parent_close_policy=workflow.ParentClosePolicy.ABANDON,
+                    )
+                    self._progress["started"] += 1
+                    self._emit(
+                        member_id, email, "STARTED",
+                        workflow_id=child.id, run_id=child.first_execution_run_id,
+                    )
+                except Exception as e:
+                    workflow.logger.warning("Workflow start failed for %s: %s", email, e)
+                    self._progress["start_failed"] += 1
+                    self._emit(member_id, email, "START_FAILED", message=str(e))
+
+        await asyncio.gather(
+            *(start_one(m["member_id"], m["email"], m["token"]) for m in members)
+        )
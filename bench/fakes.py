@@ -0,0 +1,136 @@
+# bench/fakes.py
+"""
+Local stand-ins for the two upstreams, so the benchmark never touches the
+real SendGrid API or Google Sheets.
+"""
+from __future__ import annotations
+
+import asyncio
+import re
+import time
+
+import gspread
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route
+
+from app.sheets import numericise
+
+
+class FakeSendGrid:
+    """
+    Minimal /v3/mail/send server. Records when each recipient was first
+    received so the benchmark can compute end-to-end latency.
+    """
+
+    def __init__(self, latency: float = 0.0, status_code: int = 202):
+        self.latency = latency
+        self.status_code = status_code
+        self.received: dict[str, float] = {}
+        self.requests = 0
+        self._server: uvicorn.Server | None = None
+        self._task: asyncio.Task | None = None
+
+    async def _send(self, request: Request) -> Response:
+        body = await request.json()
+        now = time.perf_counter()
+        self.requests += 1
+        for p in body.get("personalizations", []):
+            for to in p.get("to", []):
+                self.received.setdefault(to["email"], now)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return Response(status_code=self.status_code)
+
+    async def start(self, port: int) -> None:
+        app = Starlette(routes=[Route("/v3/mail/send", self._send, methods=["POST"])])
+        config = uvicorn.Config(
+            app, host="127.0.0.1", port=port, log_level="warning", access_log=False
+        )
+        self._server = uvicorn.Server(config)
+        self._task = asyncio.create_task(self._server.serve())
+        while not self._server.started:
+            await asyncio.sleep(0.05)
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.should_exit = True
+            await self._task
+
+
+_A1_RANGE = re.compile(r"^([A-Z]+)(\d+):([A-Z]+)(\d+)$")
+
+
+def _col_index(letters: str) -> int:
+    n = 0
+    for ch in letters:
+        n = n * 26 + (ord(ch) - ord("A") + 1)
+    return n
+
+
+class FakeWorksheet:
+    """In-memory worksheet implementing the gspread calls the app makes."""
+
+    def __init__(self, spreadsheet: "FakeSpreadsheet", title: str, rows: list[list] | None = None):
+        self.spreadsheet = spreadsheet
+        self.title = title
+        self.rows = [[str(v) for v in r] for r in rows or []]
+
+    def row_values(self, row: int) -> list[str]:
+        return list(self.rows[row - 1]) if row <= len(self.rows) else []
+
+    def col_values(self, col: int) -> list[str]:
+        return [r[col - 1] if len(r) >= col else "" for r in self.rows]
+
+    def get(self, range_name: str) -> list[list[str]]:
+        m = _A1_RANGE.match(range_name)
+        c1, r1, c2, r2 = _col_index(m[1]), int(m[2]), _col_index(m[3]), int(m[4])
+        values = [r[c1 - 1:c2] for r in self.rows[r1 - 1:r2]]
+        # The Sheets API omits trailing empty rows
+        while values and not any(values[-1]):
+            values.pop()
+        return values
+
+    def get_all_records(self) -> list[dict]:
+        if not self.rows:
+            return []
+        header = self.rows[0]
+        return [dict(zip(header, [numericise(v) for v in r])) for r in self.rows[1:]]
+
+    def append_row(self, values: list, **kwargs) -> None:
+        self.append_rows([values])
+
+    def append_rows(self, values: list[list], **kwargs) -> None:
+        self.rows.extend([str(v) for v in r] for r in values)
+
+
+class FakeSpreadsheet:
+    def __init__(self, key: str):
+        self.id = key
+        self.tabs: dict[str, FakeWorksheet] = {}
+
+    def worksheet(self, title: str) -> FakeWorksheet:
+        try:
+            return self.tabs[title]
+        except KeyError:
+            raise gspread.WorksheetNotFound(title)
+
+    def add_worksheet(self, title: str, rows: int = 1000, cols: int = 26, **kwargs) -> FakeWorksheet:
+        ws = self.tabs[title] = FakeWorksheet(self, title)
+        return ws
+
+
+class FakeGspreadClient:
+    """Stands in for gspread.Client; install with sheets_access().use_client()."""
+
+    def __init__(self):
+        self.spreadsheets: dict[str, FakeSpreadsheet] = {}
+
+    def spreadsheet(self, key: str) -> FakeSpreadsheet:
+        return self.spreadsheets.setdefault(key, FakeSpreadsheet(key))
+
+    def open_by_key(self, key: str) -> FakeSpreadsheet:
+        return self.spreadsheet(key)
+
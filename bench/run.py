@@ -0,0 +1,195 @@
+# bench/run.py
+"""
+Offline throughput benchmark.
+
+Runs the FastAPI app, NotifyCampaignWorkflow/NotifyMemberWorkflow and the
+worker's activities against a local fake SendGrid server and an in-memory
+gspread stand-in, on Temporal's local test environment.
+
+    python -m bench.run --sizes 1000,10000,100000 [--batch-send] [--json out.json]
+
+Reports /notify launch time, per-member end-to-end latency percentiles
+(launch -> SendGrid receipt) and emails/sec for each roster size.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import tempfile
+import time
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _configure_env(sendgrid_port: int) -> None:
+    # Must run before any `app` import: settings are read at import time
+    defaults = {
+        "TEMPORAL_NAMESPACE": "default",
+        "TEMPORAL_API_KEY": "bench",
+        "TEMPORAL_ADDRESS": "localhost:7233",
+        "TASK_QUEUE": "bench-task-queue",
+        "ALLOWED_ORIGINS": "*",
+        "GOOGLE_SHEET_ID": "bench-sheet",
+        "SENDGRID_API_KEY": "SG.bench",
+        "SENDGRID_TEMPLATE_ID": "d-bench",
+        "SENDGRID_FROM_EMAIL": "bench@example.com",
+        "SENDGRID_API_BASE_URL": f"http://127.0.0.1:{sendgrid_port}",
+        # The fakes have no quota; measure our code, not the pacing
+        "SENDGRID_RATE_PER_SECOND": "1000000",
+        "SENDGRID_RATE_BURST": "1000000",
+        "RATE_LIMIT_STATE_DIR": tempfile.mkdtemp(prefix="bench-ratelimit-"),
+        # Fresh per run: every run sends the same payload, so a shared
+        # index would suppress the whole roster from the second run on
+        "SUPPRESSION_PATH": os.path.join(
+            tempfile.mkdtemp(prefix="bench-suppression-"), "suppression.db"
+        ),
+        "AUTH_STATIC_BEARER_TOKEN": "bench-token",
+        "AUTH_JWT_SECRET": "",
+    }
+    for key, value in defaults.items():
+        os.environ.setdefault(key, value)
+    os.environ["SENDGRID_API_BASE_URL"] = defaults["SENDGRID_API_BASE_URL"]
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, max(0, round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+
+async def run_size(size, http, sendgrid, spreadsheet, batch_send: bool, timeout: float) -> dict:
+    from app.settings import settings
+
+    tab = f"Bench{size}"
+    rows = [["member_id", "email"]] + [
+        [f"{size}-{i}", f"m{size}-{i}@bench.example.com"] for i in range(size)
+    ]
+    ws = spreadsheet.add_worksheet(tab)
+    ws.append_rows(rows)
+    spreadsheet.worksheet(settings.GOOGLE_SHEET_TAB).append_rows(rows[1:])
+
+    body = {
+        "sheet_tab": tab,
+        "brand_name": "Bench",
+        "app_name": "Bench App",
+        "appstore_link": "https://apps.example.com/ios",
+        "playstore_link": "https://apps.example.com/android",
+        "website_portal": "https://example.com",
+        "batch_send": batch_send,
+    }
+    headers = {"Authorization": f"Bearer {settings.AUTH_STATIC_BEARER_TOKEN}"}
+
+    start = time.perf_counter()
+    resp = await http.post("/notify", json=body, headers=headers)
+    launched = time.perf_counter()
+    resp.raise_for_status()
+    job_id = resp.json()["campaign_id"]
+
+    progress = {}
+    deadline = start + timeout
+    while time.perf_counter() < deadline:
+        progress = (await http.get(f"/notify/{job_id}", headers=headers)).json()
+        if progress.get("status") == "COMPLETED":
+            break
+        await asyncio.sleep(0.5)
+    finished = time.perf_counter()
+
+    emails = {r[1] for r in rows[1:]}
+    receipts = sorted(t for email, t in sendgrid.received.items() if email in emails)
+    latencies = [t - start for t in receipts]
+    span = (receipts[-1] - start) if receipts else 0.0
+
+    return {
+        "size": size,
+        "mode": "batch" if batch_send else "per-member",
+        "status": progress.get("status"),
+        "launch_s": launched - start,
+        "total_s": finished - start,
+        "delivered": len(receipts),
+        "p50_s": _percentile(latencies, 50),
+        "p95_s": _percentile(latencies, 95),
+        "p99_s": _percentile(latencies, 99),
+        "mean_s": statistics.fmean(latencies) if latencies else 0.0,
+        "emails_per_s": len(receipts) / span if span else 0.0,
+        "sendgrid_requests": sendgrid.requests,
+    }
+
+
+async def main(argv: list[str] | None = None) -> list[dict]:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--batch-send", action="store_true")
+    parser.add_argument("--timeout", type=float, default=3600.0, help="per size, seconds")
+    parser.add_argument("--sendgrid-latency", type=float, default=0.0, help="fake API delay, seconds")
+    parser.add_argument("--json", dest="json_path", help="also write results here")
+    args = parser.parse_args(argv)
+
+    sendgrid_port = _free_port()
+    _configure_env(sendgrid_port)
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    import httpx
+    from temporalio.testing import WorkflowEnvironment
+
+    from app.main import app
+    from app.settings import settings
+    from app.sheets import sheets_access
+    from app.deliverability import StaticResolver, get_address_validator
+    from app.emailer import close_emailer
+    from app.logsink import log_sink
+    from worker.worker import build_worker
+
+    from bench.fakes import FakeGspreadClient, FakeSendGrid
+
+    gspread_client = FakeGspreadClient()
+    spreadsheet = gspread_client.spreadsheet(settings.GOOGLE_SHEET_ID)
+    spreadsheet.add_worksheet(settings.GOOGLE_SHEET_TAB).append_row(["member_id", "email"])
+    sheets_access().use_client(gspread_client)
+    get_address_validator().use_resolver(StaticResolver())  # no DNS from the benchmark
+
+    sendgrid = FakeSendGrid(latency=args.sendgrid_latency)
+    await sendgrid.start(sendgrid_port)
+
+    results = []
+    async with await WorkflowEnvironment.start_local() as env:
+        app.state.temporal = env.client
+        executor = ThreadPoolExecutor(max_workers=settings.WORKER_ACTIVITY_THREADS)
+        worker = build_worker(env.client, executor)
+        transport = httpx.ASGITransport(app=app)
+        async with worker, httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+            for size in [int(s) for s in args.sizes.split(",") if s]:
+                result = await run_size(
+                    size, http, sendgrid, spreadsheet, args.batch_send, args.timeout
+                )
+                results.append(result)
+                print(
+                    f"{result['size']:>7} {result['mode']:<10} {result['status']:<10} "
+                    f"launch={result['launch_s']:.3f}s total={result['total_s']:.1f}s "
+                    f"p50={result['p50_s']:.2f}s p95={result['p95_s']:.2f}s "
+                    f"p99={result['p99_s']:.2f}s {result['emails_per_s']:.0f} emails/s",
+                    flush=True,
+                )
+
+    executor.shutdown()
+    await log_sink.close()
+    await close_emailer()
+    await sendgrid.stop()
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
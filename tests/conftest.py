@@ -0,0 +1,13 @@
+import os
+import sys
+
+# app.settings reads these at import time
+for key, value in {
+    "TEMPORAL_NAMESPACE": "default",
+    "TEMPORAL_API_KEY": "test",
+    "TEMPORAL_ADDRESS": "localhost:7233",
+    "ALLOWED_ORIGINS": "*",
+}.items():
+    os.environ.setdefault(key, value)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
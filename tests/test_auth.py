@@ -0,0 +1,58 @@
+import pytest
+from fastapi import HTTPException
+
+from app import auth
+from app.auth import TokenVerifier
+
+
+def _verifier(**kwargs):
+    options = {"static_token": None, "jwt_secret": "secret", "cache_size": 2, "cache_ttl": 60.0}
+    options.update(kwargs)
+    return TokenVerifier(**options)
+
+
+def test_cached_tokens_expire_at_ttl_or_exp():
+    verifier = _verifier()
+
+    verifier._remember("ttl", {}, now=100.0)
+    verifier._remember("exp", {"exp": 130}, now=100.0)
+
+    assert verifier._cached("ttl", 159.0)
+    assert not verifier._cached("ttl", 160.0)
+    assert verifier._cached("exp", 129.0)
+    assert not verifier._cached("exp", 130.0)
+    assert "exp" not in verifier._cache
+
+
+def test_cache_evicts_the_least_recently_used_token():
+    verifier = _verifier()
+    verifier._remember("a", {}, now=100.0)
+    verifier._remember("b", {}, now=100.0)
+
+    verifier._cached("a", 101.0)
+    verifier._remember("c", {}, now=101.0)
+
+    assert list(verifier._cache) == ["a", "c"]
+
+
+def test_static_token_mismatch_is_rejected():
+    verifier = _verifier(static_token="right", jwt_secret=None)
+
+    verifier.verify("Bearer right")
+    with pytest.raises(HTTPException) as rejected:
+        verifier.verify("Bearer wrong")
+
+    assert rejected.value.status_code == 401
+    assert verifier.counters == {"static_ok": 1, "static_mismatch": 1}
+
+
+def test_repeat_jwt_skips_verification(monkeypatch):
+    jwt = pytest.importorskip("jwt")
+    token = jwt.encode({"sub": "svc"}, "secret", algorithm="HS256")
+    verifier = _verifier()
+
+    verifier.verify(f"Bearer {token}")
+    monkeypatch.setattr(auth.jwt, "decode", lambda *a, **kw: pytest.fail("decoded again"))
+    verifier.verify(f"Bearer {token}")
+
+    assert verifier.counters == {"jwt_ok": 1, "jwt_cached": 1}
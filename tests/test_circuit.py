@@ -0,0 +1,74 @@
+import pytest
+
+from app import circuit
+from app.circuit import CircuitBreaker, CircuitOpen
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(circuit.time, "monotonic", lambda: now[0])
+    return now
+
+
+def _opened(threshold=2, reset_timeout=30.0):
+    breaker = CircuitBreaker("test", failure_threshold=threshold, reset_timeout=reset_timeout)
+    for _ in range(threshold):
+        breaker.before_call()
+        breaker.record_failure()
+    return breaker
+
+
+def test_opens_after_consecutive_failures_and_refuses_calls(clock):
+    breaker = _opened()
+
+    assert breaker.state == "open"
+    clock[0] += 10
+    with pytest.raises(CircuitOpen) as refused:
+        breaker.before_call()
+    assert refused.value.retry_after == pytest.approx(20.0)
+    assert breaker.stats()["opens"] == 1
+    assert breaker.stats()["rejected"] == 1
+
+
+def test_success_resets_the_failure_count(clock):
+    breaker = CircuitBreaker("test", failure_threshold=2)
+
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+
+    assert breaker.state == "closed"
+
+
+def test_half_open_lets_one_probe_through(clock):
+    breaker = _opened()
+    clock[0] += 30
+
+    breaker.before_call()
+    with pytest.raises(CircuitOpen):
+        breaker.before_call()
+
+    breaker.record_success()
+    assert breaker.state == "closed"
+    breaker.before_call()
+
+
+def test_failed_probe_opens_the_circuit_again(clock):
+    breaker = _opened()
+    clock[0] += 30
+
+    breaker.before_call()
+    breaker.record_failure()
+
+    assert breaker.state == "open"
+    assert breaker.stats()["opens"] == 1
+
+
+def test_probe_that_never_reports_is_replaced(clock):
+    breaker = _opened()
+    clock[0] += 30
+    breaker.before_call()
+
+    clock[0] += 30
+    breaker.before_call()
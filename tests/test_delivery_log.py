@@ -0,0 +1,50 @@
+import csv
+
+import pandas as pd
+import pytest
+
+from app.settings import settings
+from app.sheets import LOG_COLUMNS, SheetClient
+
+ROW = {"workflow_id": "wf-1", "run_id": "run-1", "member_id": "12", "email": "a@example.com", "status": "sent"}
+
+
+@pytest.fixture
+def log_path(tmp_path, monkeypatch):
+    path = tmp_path / "delivery_log.csv"
+    monkeypatch.setattr(settings, "LOG_BACKEND", "csv")
+    monkeypatch.setattr(settings, "LOG_CSV_PATH", str(path))
+    return path
+
+
+def test_csv_rows_match_an_existing_log_header(log_path):
+    pd.DataFrame([[1, "t", "wf-0", "run-0", "11", "b@example.com", "sent", "", 202]], columns=LOG_COLUMNS).to_csv(
+        log_path, index=False
+    )
+
+    SheetClient().append_log_rows([ROW])
+
+    log = pd.read_csv(log_path, dtype=str)
+    assert list(log.columns) == LOG_COLUMNS
+    assert list(log["member_id"]) == ["11", "12"]
+
+
+def test_dedupe_skips_rows_already_in_the_csv(log_path):
+    client = SheetClient()
+    client.append_log_rows([ROW])
+    client.append_log_rows([ROW, {**ROW, "status": "failed"}], dedupe=True)
+
+    with open(log_path, newline="") as f:
+        statuses = [r["status"] for r in csv.DictReader(f)]
+    assert statuses == ["sent", "failed"]
+
+
+def test_dedupe_keeps_repeated_rows_not_yet_in_the_csv(log_path):
+    duplicate = {**ROW, "status": "duplicate", "event_id": "dup-0"}
+    client = SheetClient()
+    client.append_log_rows([duplicate])
+    client.append_log_rows([duplicate, {**duplicate, "event_id": "dup-1"}], dedupe=True)
+
+    with open(log_path, newline="") as f:
+        statuses = [r["status"] for r in csv.DictReader(f)]
+    assert statuses == ["duplicate", "duplicate"]
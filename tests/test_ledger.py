@@ -0,0 +1,48 @@
+from app.ledger import DeliveryLedger
+
+
+def _row(member_id, status="sent", campaign_id="camp-1", **extra):
+    row = {
+        "ts_epoch": 1,
+        "ts_iso": "t",
+        "campaign_id": campaign_id,
+        "workflow_id": f"wf-{member_id}",
+        "run_id": "run-1",
+        "member_id": member_id,
+        "email": f"{member_id}@example.com",
+        "status": status,
+        "event_id": f"{campaign_id}-{member_id}-{status}",
+    }
+    row.update(extra)
+    return row
+
+
+def test_retried_rows_are_not_inserted_twice(tmp_path):
+    ledger = DeliveryLedger(str(tmp_path / "ledger.db"))
+
+    assert ledger.append([_row("1"), _row("2")]) == 2
+    assert ledger.append([_row("2"), _row("3")]) == 1
+
+    assert ledger.stats() == {"inserted": 3, "duplicates": 1}
+
+
+def test_query_filters_newest_first_and_pages_by_id(tmp_path):
+    ledger = DeliveryLedger(str(tmp_path / "ledger.db"))
+    ledger.append([_row(str(i)) for i in range(5)] + [_row("9", campaign_id="camp-2")])
+
+    first = ledger.query(limit=2, campaign_id="camp-1")
+    rest = ledger.query(limit=10, before_id=first[-1]["id"], campaign_id="camp-1")
+
+    assert [r["member_id"] for r in first] == ["4", "3"]
+    assert [r["member_id"] for r in rest] == ["2", "1", "0"]
+    assert ledger.query(member_id="9", status="failed") == []
+
+
+def test_counts_group_matching_rows_by_status(tmp_path):
+    ledger = DeliveryLedger(str(tmp_path / "ledger.db"))
+    ledger.append(
+        [_row("1"), _row("2"), _row("3", "failed"), _row("4", "sent", campaign_id="camp-2")]
+    )
+
+    assert ledger.counts(campaign_id="camp-1") == {"sent": 2, "failed": 1}
+    assert ledger.counts() == {"sent": 3, "failed": 1}
@@ -0,0 +1,42 @@
+import asyncio
+import csv
+import threading
+import time
+
+from app import logsink
+from app.settings import settings
+from app.sheets import SheetClient
+
+ROW = {"workflow_id": "wf-1", "run_id": "run-1", "member_id": "12", "email": "a@example.com", "status": "sent"}
+
+
+def test_close_mid_flush_does_not_write_rows_twice(tmp_path, monkeypatch):
+    path = tmp_path / "delivery_log.csv"
+    monkeypatch.setattr(settings, "LOG_BACKEND", "csv")
+    monkeypatch.setattr(settings, "LOG_CSV_PATH", str(path))
+    monkeypatch.setattr(settings, "LOG_FLUSH_MAX_ROWS", 1)
+    monkeypatch.setattr(logsink, "get_suppression_index", lambda: None)
+
+    client = SheetClient()
+    appending = threading.Event()
+
+    def slow_append(rows, dedupe=False):
+        appending.set()
+        time.sleep(0.2)
+        SheetClient.append_log_rows(client, rows, dedupe)
+
+    monkeypatch.setattr(client, "append_log_rows", slow_append)
+    monkeypatch.setattr(logsink, "get_sheet_client", lambda: client)
+
+    async def scenario():
+        sink = logsink.DeliveryLogSink()
+        write = asyncio.create_task(sink.write(ROW))
+        while not appending.is_set():
+            await asyncio.sleep(0.01)
+        await sink.close()
+        await write
+
+    asyncio.run(scenario())
+
+    with open(path, newline="") as f:
+        assert [r["member_id"] for r in csv.DictReader(f)] == ["12"]
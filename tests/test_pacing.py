@@ -0,0 +1,62 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from app import workflows
+from app.workflows import NotifyCampaignWorkflow
+
+NOW = 1000.0
+
+
+@pytest.fixture(autouse=True)
+def clock(monkeypatch):
+    monkeypatch.setattr(
+        workflows.workflow, "now", lambda: datetime.fromtimestamp(NOW, tz=timezone.utc)
+    )
+
+
+def _campaign(**pacing):
+    campaign = NotifyCampaignWorkflow()
+    campaign._pacing = {"next_at": 0.0, "domains": {}, "started_at": NOW, **pacing}
+    return campaign
+
+
+def _members(*emails):
+    return [{"member_id": str(i), "email": email} for i, email in enumerate(emails)]
+
+
+def _plan_emails(plan):
+    return [(at, [m["email"] for m in group]) for at, group in plan]
+
+
+def test_page_is_spread_over_its_share_of_the_window():
+    campaign = _campaign(window_minutes=10)
+
+    plan = campaign._plan(_members("a@x.com", "b@x.com", "c@y.com", "d@y.com"), 4, 6)
+
+    assert [at for at, _ in plan] == [NOW, NOW + 60, NOW + 120, NOW + 180]
+    assert campaign._pacing["next_at"] == NOW + 240
+    expected = datetime.fromtimestamp(NOW + 600, tz=timezone.utc).isoformat()
+    assert campaign._progress["projected_completion"] == expected
+
+
+def test_domain_cap_moves_only_that_domains_members():
+    campaign = _campaign(domain_per_minute=2)
+
+    plan = campaign._plan(_members("a@x.com", "b@x.com", "c@y.com", "d@x.com"), 4, 0)
+
+    assert _plan_emails(plan) == [
+        (NOW, ["a@x.com", "c@y.com"]),
+        (NOW + 30, ["b@x.com"]),
+        (NOW + 60, ["d@x.com"]),
+    ]
+    assert campaign._pacing["domains"] == {"x.com": NOW + 90, "y.com": NOW + 30}
+
+
+def test_domain_slots_carry_over_to_the_next_page():
+    campaign = _campaign(domain_per_minute=1)
+    campaign._plan(_members("a@x.com"), 1, 1)
+
+    plan = campaign._plan(_members("b@x.com", "c@y.com"), 2, 0)
+
+    assert _plan_emails(plan) == [(NOW, ["c@y.com"]), (NOW + 60, ["b@x.com"])]
@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+
+from app import prevalidate
+from app.deliverability import AddressValidator, StaticResolver
+from app.suppression import SuppressionIndex
+
+CAMPAIGN_REF = "ref-1"
+
+
+class _Roster:
+    def __init__(self, members):
+        self.members = set(members)
+
+    def roster_contains(self, member_ids, emails):
+        return np.array([(m, e) in self.members for m, e in zip(member_ids, emails)], dtype=bool)
+
+
+@pytest.fixture
+def index(tmp_path, monkeypatch):
+    index = SuppressionIndex(str(tmp_path / "suppression.db"))
+    monkeypatch.setattr(prevalidate, "get_suppression_index", lambda: index)
+    roster = _Roster({("12", "a@example.com"), ("13", "b@example.com"), ("14", "c@example.com")})
+    monkeypatch.setattr(prevalidate, "get_sheet_client", lambda: roster)
+    validator = AddressValidator(resolver=StaticResolver({}, default=True))
+    monkeypatch.setattr(prevalidate, "get_address_validator", lambda: validator)
+    return index
+
+
+PAGE = [
+    {"member_id": "12", "email": "a@example.com"},
+    {"member_id": "13", "email": "b@example.com"},
+    {"member_id": "13", "email": "B@example.com "},
+    {"member_id": "14", "email": "c@example.com"},
+    {"member_id": "", "email": ""},
+]
+
+
+def _statuses(result):
+    return [(r["member_id"], r["status"]) for r in result["rejected"]]
+
+
+def test_suppresses_sent_members_alongside_incomplete_and_duplicate_rows(index):
+    index.record([
+        {"campaign_ref": CAMPAIGN_REF, "member_id": "12", "email": "a@example.com", "status": "sent"},
+        {"campaign_ref": CAMPAIGN_REF, "member_id": "14", "email": "c@example.com", "status": "failed"},
+    ])
+
+    result = prevalidate.prevalidate_members(PAGE, "camp", CAMPAIGN_REF)
+
+    assert [v["member_id"] for v in result["verified"]] == ["13", "14"]
+    assert _statuses(result) == [("12", "suppressed"), ("13", "skipped"), ("", "skipped")]
+    assert index.suppressed == 1
+
+
+def test_resend_statuses_only_keeps_selected_outcomes(index):
+    index.record([
+        {"campaign_ref": CAMPAIGN_REF, "member_id": "12", "email": "a@example.com", "status": "sent"},
+        {"campaign_ref": CAMPAIGN_REF, "member_id": "14", "email": "c@example.com", "status": "failed"},
+    ])
+
+    result = prevalidate.prevalidate_members(PAGE, "camp", CAMPAIGN_REF, resend_statuses=["failed"])
+
+    assert [v["member_id"] for v in result["verified"]] == ["14"]
+    assert _statuses(result) == [
+        ("12", "suppressed"), ("13", "suppressed"), ("13", "skipped"), ("", "skipped"),
+    ]
+    messages = {r["member_id"]: r["message"] for r in result["rejected"] if r["status"] == "suppressed"}
+    assert messages["12"] == prevalidate.ALREADY_SENT_MESSAGE
+    assert messages["13"] == "Last outcome none not selected for resend"
+
+
+def test_not_found_rows_are_rejected(index):
+    page = [
+        {"member_id": "99", "email": "z@example.com"},
+        {"member_id": "13", "email": "b@example.com"},
+    ]
+
+    result = prevalidate.prevalidate_members(page, "camp", CAMPAIGN_REF)
+
+    assert [v["member_id"] for v in result["verified"]] == ["13"]
+    assert result["verified"][0]["token"] == prevalidate.verification_token("camp", "13", "b@example.com")
+    assert _statuses(result) == [("99", "not_found")]
+
+
+def test_no_suppression_key_sends_to_already_sent_members(index):
+    # What a resend_all campaign passes
+    index.record([
+        {"campaign_ref": CAMPAIGN_REF, "member_id": "12", "email": "a@example.com", "status": "sent"},
+    ])
+
+    result = prevalidate.prevalidate_members(PAGE, "camp", None)
+
+    assert [v["member_id"] for v in result["verified"]] == ["12", "13", "14"]
+    assert index.suppressed == 0
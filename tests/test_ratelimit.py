@@ -0,0 +1,56 @@
+import asyncio
+
+import pytest
+
+from app.ratelimit import RateLimitBusy, RateLimiter
+
+
+def _limiter(tmp_path, **kwargs):
+    options = {"max_rate": 10.0, "burst": 2.0, "min_rate": 0.5, "increase": 1.0}
+    options.update(kwargs)
+    return RateLimiter("test", state_dir=str(tmp_path), **options)
+
+
+def test_burst_is_free_then_callers_queue_at_the_rate(tmp_path):
+    limiter = _limiter(tmp_path)
+
+    waits = [limiter._reserve() for _ in range(4)]
+
+    assert waits[:2] == pytest.approx([0.0, 0.0], abs=0.01)
+    assert waits[2] == pytest.approx(0.1, abs=0.01)
+    assert waits[3] == pytest.approx(0.2, abs=0.01)
+
+
+def test_throttle_halves_the_rate_and_blocks_for_retry_after(tmp_path):
+    limiter = _limiter(tmp_path)
+
+    limiter.throttle(3.0)
+
+    assert limiter.rate == 5.0
+    assert limiter._reserve() == pytest.approx(3.2, abs=0.05)
+    limiter.succeeded()
+    assert limiter.rate == 6.0
+
+
+def test_waits_past_max_wait_are_refused_without_adding_debt(tmp_path):
+    limiter = _limiter(tmp_path, max_wait=0.15)
+    for _ in range(3):
+        limiter._reserve()
+
+    with pytest.raises(RateLimitBusy) as busy:
+        asyncio.run(limiter.acquire())
+    assert busy.value.retry_after == pytest.approx(0.2, abs=0.01)
+    # The refused call took no token: the next one waits just as long
+    with pytest.raises(RateLimitBusy) as again:
+        limiter.acquire_sync()
+    assert again.value.retry_after == pytest.approx(0.2, abs=0.02)
+    assert limiter.stats()["refused"] == 2
+
+
+def test_state_is_shared_through_the_state_dir(tmp_path):
+    first, second = _limiter(tmp_path), _limiter(tmp_path)
+
+    first._reserve()
+    first._reserve()
+
+    assert second._reserve() == pytest.approx(0.1, abs=0.01)
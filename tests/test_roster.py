@@ -0,0 +1,40 @@
+import pytest
+
+from app.settings import settings
+from app.sheets import SheetClient, SheetsAccess
+from bench.fakes import FakeGspreadClient
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(settings, "GOOGLE_SHEET_ID", "sheet")
+    monkeypatch.setattr(settings, "LOG_BACKEND", "sheets")
+    monkeypatch.setattr(settings, "ROSTER_REVISION_CHECK_SECONDS", 0)
+    monkeypatch.setattr(settings, "ROSTER_SNAPSHOT_PATH", None)
+
+    gspread = FakeGspreadClient()
+    members = gspread.spreadsheet("sheet").add_worksheet(settings.GOOGLE_SHEET_TAB)
+    members.append_rows([["member_id", "email"], ["12", "A@example.com"]])
+
+    client = SheetClient()
+    client._sheets = SheetsAccess(None)
+    client._sheets.use_client(gspread)
+    return client
+
+
+def test_log_writes_do_not_invalidate_the_roster_cache(client):
+    for status in ("sent", "failed", "sent"):
+        assert client.lookup_member("12", "a@example.com") is not None
+        client.append_log_rows([{"workflow_id": "wf", "member_id": "12", "email": "a@example.com", "status": status}])
+
+    assert client.roster_refreshes == 1
+    assert client.roster_hits == 2
+
+
+def test_roster_is_reloaded_once_its_ttl_expires(client, monkeypatch):
+    assert client.lookup_member("13", "b@example.com") is None
+    client._sheets.worksheet(settings.GOOGLE_SHEET_TAB).append_rows([["13", "b@example.com"]])
+    monkeypatch.setattr(settings, "ROSTER_CACHE_TTL_SECONDS", 0)
+
+    assert client.lookup_member("13", "b@example.com") is not None
+    assert client.roster_refreshes == 2
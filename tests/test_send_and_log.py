@@ -0,0 +1,49 @@
+import asyncio
+import dataclasses
+
+import pytest
+from temporalio.exceptions import ActivityError, ApplicationError, RetryState
+from temporalio.testing import ActivityEnvironment
+
+from app import activities
+from app.workflows import _unlogged_outcome
+
+OUTCOME = {"status": "sent", "sendgrid_status": "202", "message": "SendGrid status 202"}
+
+
+def _activity_error(cause: Exception) -> ActivityError:
+    error = ActivityError(
+        "Activity task failed",
+        scheduled_event_id=1,
+        started_event_id=2,
+        identity="worker",
+        activity_type="send_and_log_email",
+        activity_id="1",
+        retry_state=RetryState.MAXIMUM_ATTEMPTS_REACHED,
+    )
+    error.__cause__ = cause
+    return error
+
+
+def test_failed_log_write_carries_the_heartbeated_outcome(monkeypatch):
+    async def failing_write(row):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(activities.log_sink, "write", failing_write)
+    monkeypatch.setattr(activities, "get_emailer", lambda: pytest.fail("sent twice"))
+
+    env = ActivityEnvironment()
+    env.info = dataclasses.replace(env.info, heartbeat_details=[OUTCOME])
+    with pytest.raises(ApplicationError) as raised:
+        asyncio.run(
+            env.run(activities.send_and_log_email, "wf-1", "run-1", "12", "a@example.com", {})
+        )
+
+    assert raised.value.type == activities.DELIVERY_LOG_ERROR
+    assert not raised.value.non_retryable
+    assert _unlogged_outcome(_activity_error(raised.value)) == OUTCOME
+
+
+def test_send_failure_has_no_outcome():
+    error = _activity_error(ApplicationError("503", type="TransientSendError"))
+    assert _unlogged_outcome(error) is None
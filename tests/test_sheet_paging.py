@@ -0,0 +1,41 @@
+from app import utils
+from app.sheets import iter_worksheet_pages
+from bench.fakes import FakeGspreadClient
+
+ROWS = [
+    ["member_id", "email"],
+    ["1", "a@example.com"],
+    ["2", "b@example.com"],
+    ["", ""],  # last row of the first page
+    ["4", "d@example.com"],
+    ["5", "e@example.com"],
+]
+
+
+def _worksheet():
+    ws = FakeGspreadClient().spreadsheet("sheet").add_worksheet("Tab")
+    ws.append_rows(ROWS)
+    return ws
+
+
+def test_blank_row_at_a_page_boundary_does_not_end_the_tab():
+    pages = list(iter_worksheet_pages(_worksheet(), page_size=3))
+
+    assert [[r["member_id"] for r in page] for page in pages] == [[1, 2], [4, 5]]
+
+
+def test_member_pages_cover_fixed_row_ranges(monkeypatch):
+    ws = _worksheet()
+
+    class Access:
+        def worksheet(self, tab, sheet_id=None):
+            return ws
+
+    monkeypatch.setattr(utils, "sheets_access", lambda path=None: Access())
+
+    def page(offset):
+        return [m["member_id"] for m in utils.get_members_from_sheet("sheet", "Tab", offset=offset, limit=3)]
+
+    assert page(0) == [1, 2]
+    assert page(3) == [4, 5]
+    assert page(6) == []
@@ -0,0 +1,70 @@
+import sqlite3
+
+import pytest
+
+from app import ledger, suppression
+from app.ledger import DeliveryLedger
+from app.settings import settings
+from app.suppression import SuppressionIndex
+
+KEY = ("12", "a@example.com")
+
+
+def _row(event_id, status, ref="ref-1"):
+    return {
+        "ts_epoch": 1, "ts_iso": "t", "campaign_id": "camp", "campaign_ref": ref,
+        "workflow_id": "wf", "run_id": "run", "member_id": KEY[0], "email": KEY[1],
+        "status": status, "event_id": event_id,
+    }
+
+
+@pytest.fixture
+def ledger_log(tmp_path, monkeypatch):
+    log = DeliveryLedger(str(tmp_path / "ledger.db"))
+    monkeypatch.setattr(ledger, "_ledger", log)
+    monkeypatch.setattr(settings, "LOG_BACKEND", "sqlite")
+    return log
+
+
+def test_rebuild_replays_the_ledger_in_order(tmp_path, ledger_log):
+    ledger_log.append([_row("e1", "failed"), _row("e2", "sent"), _row("e3", "bounced")])
+    ledger_log.append([_row("e4", "sent", ref="ref-2"), _row("e5", "failed", ref="ref-2")])
+
+    index = SuppressionIndex(str(tmp_path / "suppression.db"), backfill=False)
+    assert index.rebuild(ledger_log.iter_outcomes(batch_size=2)) == 5
+
+    # A bounce overrides "sent"; a later failure does not
+    assert index.outcomes("ref-1", [KEY]) == {KEY: "invalid_address"}
+    assert index.outcomes("ref-2", [KEY]) == {KEY: "sent"}
+
+
+def test_new_index_is_backfilled_from_the_ledger(tmp_path, ledger_log):
+    ledger_log.append([_row("e1", "sent")])
+
+    index = SuppressionIndex(str(tmp_path / "suppression.db"))
+
+    assert index.outcomes("ref-1", [KEY]) == {KEY: "sent"}
+
+
+def test_ledger_without_campaign_ref_column_is_migrated(tmp_path):
+    path = tmp_path / "ledger.db"
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE deliveries (id INTEGER PRIMARY KEY, ts_epoch INTEGER NOT NULL, "
+        "ts_iso TEXT NOT NULL, campaign_id TEXT NOT NULL DEFAULT '', workflow_id TEXT NOT NULL, "
+        "run_id TEXT NOT NULL, member_id TEXT NOT NULL, email TEXT NOT NULL, status TEXT NOT NULL, "
+        "message TEXT NOT NULL DEFAULT '', sendgrid_status TEXT NOT NULL DEFAULT '', "
+        "event_id TEXT NOT NULL UNIQUE)"
+    )
+    conn.commit()
+    conn.close()
+
+    log = DeliveryLedger(str(path))
+    assert log.append([_row("e1", "sent")]) == 1
+    assert [r["campaign_ref"] for r in log.query()] == ["ref-1"]
+
+
+def test_rebuild_cli_needs_the_ledger_backend(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "LOG_BACKEND", "csv")
+    with pytest.raises(SystemExit):
+        suppression.main(["--path", str(tmp_path / "suppression.db")])
@@ -0,0 +1,81 @@
+import asyncio
+import csv
+import threading
+import time
+
+import pytest
+
+from app import webhooks
+from app.settings import settings
+from app.sheets import SheetClient
+
+EVENT = {
+    "event": "delivered",
+    "email": "a@example.com",
+    "sg_event_id": "sg-1",
+    "workflow_id": "wf-1",
+    "run_id": "run-1",
+    "member_id": "12",
+    "campaign_id": "campaign-1",
+}
+
+
+def test_retried_flush_does_not_duplicate_csv_rows(tmp_path, monkeypatch):
+    path = tmp_path / "delivery_log.csv"
+    monkeypatch.setattr(settings, "LOG_BACKEND", "csv")
+    monkeypatch.setattr(settings, "LOG_CSV_PATH", str(path))
+    monkeypatch.setattr(webhooks, "get_suppression_index", lambda: None)
+
+    client = SheetClient()
+    calls = []
+
+    def append_then_fail(rows, dedupe=False):
+        calls.append(dedupe)
+        SheetClient.append_log_rows(client, rows, dedupe)
+        if len(calls) == 1:
+            raise ConnectionError("response lost")
+
+    monkeypatch.setattr(client, "append_log_rows", append_then_fail)
+    monkeypatch.setattr(webhooks, "get_sheet_client", lambda: client)
+
+    ingestor = webhooks.WebhookIngestor()
+    ingestor._pending.append(EVENT)
+    with pytest.raises(ConnectionError):
+        asyncio.run(ingestor.flush())
+    asyncio.run(ingestor.flush())
+
+    assert calls == [False, True]
+    with open(path, newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert [(r["member_id"], r["status"]) for r in rows] == [("12", "delivered")]
+
+
+def test_close_mid_flush_does_not_write_events_twice(tmp_path, monkeypatch):
+    path = tmp_path / "delivery_log.csv"
+    monkeypatch.setattr(settings, "LOG_BACKEND", "csv")
+    monkeypatch.setattr(settings, "LOG_CSV_PATH", str(path))
+    monkeypatch.setattr(webhooks, "get_suppression_index", lambda: None)
+
+    client = SheetClient()
+    appending = threading.Event()
+
+    def slow_append(rows, dedupe=False):
+        appending.set()
+        time.sleep(0.2)
+        SheetClient.append_log_rows(client, rows, dedupe)
+
+    monkeypatch.setattr(client, "append_log_rows", slow_append)
+    monkeypatch.setattr(webhooks, "get_sheet_client", lambda: client)
+
+    async def scenario():
+        ingestor = webhooks.WebhookIngestor()
+        ingestor.submit([EVENT])
+        ingestor._wakeup.set()
+        while not appending.is_set():
+            await asyncio.sleep(0.01)
+        await ingestor.close()
+
+    asyncio.run(scenario())
+
+    with open(path, newline="") as f:
+        assert [r["member_id"] for r in csv.DictReader(f)] == ["12"]
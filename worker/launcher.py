@@ -0,0 +1,93 @@
+# worker/launcher.py
+"""
+Run several worker processes on one host.
+
+    python -m worker.launcher [--processes N]
+
+Each process runs worker.worker.run() with its own Temporal client, event
+loop and metrics port (WORKER_METRICS_PORT + index). SIGTERM/SIGINT is
+forwarded to every process, which drains in-flight tasks before exiting;
+a process that dies on its own is restarted.
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import multiprocessing as mp
+import os
+import signal
+import time
+
+from app.settings import settings
+from worker.worker import run
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s %(levelname)s [launcher] %(message)s",
+)
+
+RESTART_BACKOFF_SECONDS = 5
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Run N Temporal worker processes")
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=settings.WORKER_PROCESSES or os.cpu_count() or 1,
+    )
+    args = parser.parse_args(argv)
+
+    # spawn: each process builds its own client/event loop from scratch
+    ctx = mp.get_context("spawn")
+    procs: dict[int, mp.Process] = {}
+    stopping = False
+
+    def start(index: int) -> None:
+        proc = ctx.Process(target=run, args=(index,), name=f"worker-{index}")
+        proc.start()
+        procs[index] = proc
+        logging.info("Started worker-%d (pid %d)", index, proc.pid)
+
+    def _handle_signal(signum, _frame):
+        nonlocal stopping
+        if stopping:
+            return
+        stopping = True
+        logging.info("Shutdown signal received, stopping %d workers...", len(procs))
+        for proc in procs.values():
+            if proc.is_alive():
+                proc.terminate()  # SIGTERM: graceful drain in the child
+
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, _handle_signal)
+
+    for index in range(args.processes):
+        start(index)
+
+    while not stopping:
+        time.sleep(1)
+        for index, proc in list(procs.items()):
+            if not proc.is_alive() and not stopping:
+                logging.warning(
+                    "worker-%d exited with code %s; restarting in %ds",
+                    index, proc.exitcode, RESTART_BACKOFF_SECONDS,
+                )
+                time.sleep(RESTART_BACKOFF_SECONDS)
+                if not stopping:
+                    start(index)
+
+    # Leave room for activity drain plus the final log flush
+    deadline = time.monotonic() + settings.WORKER_GRACEFUL_SHUTDOWN_SECONDS + 30
+    for index, proc in procs.items():
+        proc.join(max(deadline - time.monotonic(), 0))
+        if proc.is_alive():
+            logging.warning("worker-%d did not stop in time; killing", index)
+            proc.kill()
+            proc.join()
+
+    logging.info("All workers stopped")
+
+
+if __name__ == "__main__":
+    main()
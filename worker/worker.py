@@ -1,20 +1,51 @@
 # worker/worker.py
 from __future__ import annotations
 
+import time
+
+_IMPORT_STARTED = time.perf_counter()
+
 import asyncio
 import logging
 import signal
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
 
+from prometheus_client import start_http_server
 from temporalio.client import Client
 from temporalio.worker import Worker
 
 from app.settings import settings
-from app.workflows import NotifyMemberWorkflow
+from app.workflows import NotifyCampaignWorkflow, NotifyMemberWorkflow
 from app.activities import (
+    count_member_rows,
+    fetch_verified_page,
     lookup_member_in_sheet,
     send_email_via_sendgrid,
+    send_email_batch,
+    store_campaign_payload,
     log_delivery_event,
+    log_delivery_events,
+    send_and_log_email,
 )
+from app.emailer import close_emailer, get_emailer
+from app.logsink import log_sink
+from app.metrics import MetricsInterceptor, temporal_runtime
+from app.sheets import get_sheet_client
+from app.warmup import startup_report, warm_up
+
+WORKFLOWS = [NotifyCampaignWorkflow, NotifyMemberWorkflow]
+ACTIVITIES = [
+    count_member_rows,
+    fetch_verified_page,
+    lookup_member_in_sheet,
+    send_email_via_sendgrid,
+    send_email_batch,
+    store_campaign_payload,
+    log_delivery_event,
+    log_delivery_events,
+    send_and_log_email,
+]
 
 logging.basicConfig(
     level=logging.INFO,
@@ -22,17 +53,65 @@ logging.basicConfig(
 )
 
 
+def build_worker(client: Client, activity_executor: ThreadPoolExecutor) -> Worker:
+    """
+    Worker with the configured concurrency limits. Sync (def) activities,
+    i.e. the gspread/pandas-heavy ones, run on `activity_executor`.
+    """
+    return Worker(
+        client=client,
+        task_queue=settings.TASK_QUEUE,
+        workflows=WORKFLOWS,
+        activities=ACTIVITIES,
+        activity_executor=activity_executor,
+        max_concurrent_activities=settings.WORKER_MAX_CONCURRENT_ACTIVITIES,
+        max_concurrent_workflow_tasks=settings.WORKER_MAX_CONCURRENT_WORKFLOW_TASKS,
+        graceful_shutdown_timeout=timedelta(seconds=settings.WORKER_GRACEFUL_SHUTDOWN_SECONDS),
+        interceptors=[MetricsInterceptor()],
+    )
+
+
+def warmup_hooks() -> dict:
+    """First-use work worth doing before the worker starts polling."""
+    return {
+        "roster": lambda: get_sheet_client().warm_up(),
+        "sendgrid": lambda: get_emailer().warm_up(),
+    }
 
-async def main() -> None:
 
-    client = await Client.connect(
-        target_host=settings.TEMPORAL_ADDRESS,
-        namespace=settings.TEMPORAL_NAMESPACE,
-        api_key=settings.TEMPORAL_API_KEY,
-        tls=True,  # be explicit
+def _offset_port(address: str | None, index: int) -> str | None:
+    """'host:port' shifted by `index`, so each process gets its own port."""
+    if not address:
+        return None
+    host, port = address.rsplit(":", 1)
+    return f"{host}:{int(port) + index}"
+
+
+async def main(process_index: int = 0) -> None:
+    report = startup_report(f"worker-{process_index}", _IMPORT_STARTED)
+
+    if settings.WORKER_METRICS_PORT:
+        port = settings.WORKER_METRICS_PORT + process_index
+        start_http_server(port)
+        logging.info("Serving metrics on :%d/metrics", port)
+
+    # Connect while the warm-up hooks run
+    client, _ = await asyncio.gather(
+        report.timed(
+            "temporal_connect",
+            Client.connect(
+                target_host=settings.TEMPORAL_ADDRESS,
+                namespace=settings.TEMPORAL_NAMESPACE,
+                api_key=settings.TEMPORAL_API_KEY,
+                tls=True,  # be explicit
+                runtime=temporal_runtime(
+                    _offset_port(settings.WORKER_TEMPORAL_METRICS_ADDRESS, process_index)
+                ),
+            ),
+        ),
+        warm_up(report, warmup_hooks() if settings.WORKER_WARMUP else {}),
     )
-   
-    
+
     logging.info(
         "Connected to Temporal namespace=%s, task_queue=%s",
         settings.TEMPORAL_NAMESPACE,
@@ -40,16 +119,11 @@ async def main() -> None:
     )
 
     # Register workflows and activities
-    worker = Worker(
-        client=client,
-        task_queue=settings.TASK_QUEUE,
-        workflows=[NotifyMemberWorkflow],
-        activities=[
-            lookup_member_in_sheet,
-            send_email_via_sendgrid,
-            log_delivery_event,
-        ],
+    activity_executor = ThreadPoolExecutor(
+        max_workers=settings.WORKER_ACTIVITY_THREADS,
+        thread_name_prefix="activity",
     )
+    worker = build_worker(client, activity_executor)
 
     # Graceful shutdown on SIGINT/SIGTERM
     loop = asyncio.get_running_loop()
@@ -68,10 +142,21 @@ async def main() -> None:
 
     # Run worker until a stop signal is received
     async with worker:
+        report.ready()
         logging.info("Worker started; listening for jobs...")
         await stop_event.wait()
         logging.info("Worker stopping; waiting for in-flight tasks to finish...")
 
+    activity_executor.shutdown(wait=True)
+    await log_sink.close()
+    await close_emailer()
+    logging.info("Delivery log sink flushed: %s", log_sink.stats())
+
+
+def run(process_index: int = 0) -> None:
+    """Process entry point; used directly and by worker.launcher."""
+    asyncio.run(main(process_index))
+
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    run()